@@ -8,15 +8,14 @@ This file is the Flet GUI entrypoint.
 
 from __future__ import annotations
 
+import importlib.util
+import os
 import sys
 import traceback
 from snapchat_memories_downloader.tk_dialogs import show_error
 
-try:
-    import flet as ft
-    _HAS_FLET = True
-except ImportError:
-    _HAS_FLET = False
+# Probe without importing: flet and the GUI module graph are only loaded in main().
+_HAS_FLET = importlib.util.find_spec("flet") is not None
 
 def main():
     if not _HAS_FLET:
@@ -27,13 +26,21 @@ def main():
         sys.exit(1)
 
     try:
+        import flet as ft
         from snapchat_memories_downloader.process_lifecycle import enable_kill_children_on_exit
         from snapchat_memories_downloader.gui import main as flet_main
         
         enable_kill_children_on_exit()
         ft.app(target=flet_main)
+    except KeyboardInterrupt:
+        raise
     except Exception as e:
-        error_msg = f"Failed to launch GUI:\n{str(e)}\n\n{traceback.format_exc()}"
+        # Full tracebacks leak local paths into the dialog; opt in with SMD_DEBUG=1.
+        if os.environ.get("SMD_DEBUG"):
+            details = traceback.format_exc()
+        else:
+            details = "".join(traceback.format_exception_only(type(e), e))
+        error_msg = f"Failed to launch GUI:\n{str(e)}\n\n{details}"
         print(error_msg)
         show_error("Launch Error", error_msg)
         sys.exit(1)
@@ -4,5 +4,28 @@ Snapchat Memories Downloader (Python).
 This package contains the implementation used by `app.py`.
 """
 
-from .orchestrator import download_all_memories  # re-export for convenience
-from .report import generate_report, save_report, print_report_summary, show_report_popup
+from __future__ import annotations
+
+import importlib
+
+# Re-exported for convenience, but imported on first use: `app.py` imports a
+# light submodule before the GUI starts, and that shouldn't pull in requests,
+# Pillow and the rest of the download stack.
+_LAZY_EXPORTS = {
+    "download_all_memories": ".orchestrator",
+    "generate_report": ".report",
+    "save_report": ".report",
+    "print_report_summary": ".report",
+    "show_report_popup": ".report",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -38,7 +38,7 @@ def find_memories_history_html() -> Path | None:
 
     for base in _unique_paths(bases):
         for candidate in (base / "memories_history.html", base / "html" / "memories_history.html"):
-            if candidate.exists() and candidate.is_file():
+            if candidate.is_file():
                 return candidate
     return None
 
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from .duplicates import DuplicateIndex
+from .exif_utils import build_exif_bytes
+from .files import (
+    VIDEO_EXTENSIONS,
+    generate_filename,
+    parse_date_to_timestamp,
+    set_file_timestamp,
+    write_file_atomic,
+)
+from .job_pool import MAX_JOBS, run_job_pool
+from .metadata_store import MetadataWriter, metadata_lock
+from .overlay import merge_image_overlay, merge_video_overlay
+
+
+def merge_deferred_overlays(
+    deferred_overlays: list[tuple[str, dict, list]],
+    output_path: Path,
+    use_timestamp_filenames: bool,
+    duplicate_index: DuplicateIndex | None,
+    metadata_writer: MetadataWriter,
+    jobs: int,
+    jobs_supplier: Callable[[], int] | None = None,
+    stop_event: threading.Event | None = None,
+    progress_callback: callable = None,
+) -> None:
+    """Merge the -main/-overlay pairs a download run left for the end."""
+    with metadata_lock:
+        # Persist the download results before the merge phase starts.
+        metadata_writer.flush()
+    total = len(deferred_overlays)
+    print("\n" + "=" * 60)
+    print(f"Processing {total} deferred overlay merge(s)...")
+    print("=" * 60)
+    _report_progress(0, total, "Merging overlays", progress_callback)
+
+    merge_counter = {"count": 0}
+    merge_counter_lock = threading.Lock()
+
+    def handle(item: tuple[int, tuple[str, dict, list]]) -> None:
+        idx, (file_num, metadata, files_saved) = item
+        print(f"\n({idx}/{total}) Processing deferred merge #{metadata['number']}")
+        _merge_one(
+            file_num,
+            metadata,
+            files_saved,
+            output_path,
+            use_timestamp_filenames,
+            duplicate_index,
+            metadata_writer,
+        )
+        with merge_counter_lock:
+            merge_counter["count"] += 1
+            completed = merge_counter["count"]
+        _report_progress(
+            completed, total, f"Merging overlays ({completed}/{total})", progress_callback
+        )
+
+    default_jobs = max(1, min(int(jobs), MAX_JOBS))
+    run_job_pool(
+        enumerate(deferred_overlays, start=1),
+        handle,
+        MAX_JOBS if jobs_supplier else default_jobs,
+        default_jobs,
+        jobs_supplier,
+        stop_event,
+    )
+
+    print("\n" + "=" * 60)
+    print("Deferred overlay processing complete!")
+
+
+def _report_progress(
+    completed: int, total: int, message: str, progress_callback: callable
+) -> None:
+    if progress_callback:
+        progress_callback(
+            {
+                "type": "progress",
+                "phase": "merge",
+                "completed": completed,
+                "total": total,
+                "message": message,
+            }
+        )
+
+
+def _merge_one(
+    file_num: str,
+    metadata: dict,
+    files_saved: list,
+    output_path: Path,
+    use_timestamp_filenames: bool,
+    duplicate_index: DuplicateIndex | None,
+    metadata_writer: MetadataWriter,
+) -> None:
+    parts = {f["type"]: output_path / f["path"] for f in files_saved}
+    main_file = parts.get("main")
+    overlay_file = parts.get("overlay")
+    if not (main_file and overlay_file):
+        return
+
+    try:
+        output_filename = generate_filename(
+            metadata["date"], main_file.suffix, use_timestamp_filenames, file_num
+        )
+        merged_file = output_path / output_filename
+        merged_size = _merge_parts(main_file, overlay_file, merged_file, metadata)
+        if not merged_size:
+            print("  ERROR: Overlay merge failed, keeping separate files")
+            return
+
+        with metadata_lock:
+            metadata["files"] = [{"path": output_filename, "size": merged_size, "type": "merged"}]
+            metadata_writer.mark_dirty()
+
+        timestamp = parse_date_to_timestamp(metadata["date"])
+        if timestamp:
+            set_file_timestamp(merged_file, timestamp)
+
+        for source_file in (main_file, overlay_file):
+            if duplicate_index:
+                duplicate_index.unregister_file(source_file)
+            try:
+                source_file.unlink()
+            except FileNotFoundError:
+                continue
+            print(f"  Deleted: {source_file.name}")
+
+        print(f"  Success: {output_filename} ({merged_size:,} bytes)")
+    except Exception as e:
+        print(f"  ERROR: {str(e)}")
+        print("  Keeping separate -main/-overlay files")
+
+
+def _merge_parts(main_file: Path, overlay_file: Path, merged_file: Path, metadata: dict) -> int:
+    """Write the merged file; returns its size, or 0 if the merge failed."""
+    if main_file.suffix.lower() in VIDEO_EXTENSIONS:
+        print("  Merging video overlay (this may take a while)...")
+        if not merge_video_overlay(main_file, overlay_file, merged_file):
+            return 0
+        return merged_file.stat().st_size
+
+    print("  Merging image overlay...")
+    merged_data = merge_image_overlay(
+        main_file,
+        overlay_file,
+        build_exif_bytes(metadata["date"], metadata["latitude"], metadata["longitude"]),
+    )
+    write_file_atomic(merged_file, merged_data)
+    return len(merged_data)
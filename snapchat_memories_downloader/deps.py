@@ -17,9 +17,11 @@ import os
 import zipfile
 import shutil
 import tempfile
+import threading
 from collections.abc import Callable
 from pathlib import Path
 
+from .files import COPY_BUFFER_SIZE
 from .subprocess_utils import run_capture
 
 try:
@@ -95,14 +97,39 @@ def _check_ffmpeg_available() -> str | None:
     return None
 
 
-ffmpeg_path = _check_ffmpeg_available()
-ffmpeg_available = ffmpeg_path is not None
+# Probing spawns ffmpeg (up to a 5s timeout per candidate), so it is deferred
+# until something actually needs video support. `deps.ffmpeg_path` and
+# `deps.ffmpeg_available` resolve through the module __getattr__ below.
+_UNPROBED = object()
+_ffmpeg_path: object = _UNPROBED
+_ffmpeg_probe_lock = threading.Lock()
 _cached_encoders: list[str] | None = None
 
-if not ffmpeg_available:
-    print("Warning: ffmpeg not found. Video overlay merging will be disabled.")
-    if sys.platform != "win32":
-        print("Install: brew install ffmpeg (macOS) or apt-get install ffmpeg (Linux)")
+
+def get_ffmpeg_path() -> str | None:
+    global _ffmpeg_path
+    if _ffmpeg_path is _UNPROBED:
+        with _ffmpeg_probe_lock:
+            if _ffmpeg_path is _UNPROBED:
+                path = _check_ffmpeg_available()
+                if path is None:
+                    print("Warning: ffmpeg not found. Video overlay merging will be disabled.")
+                    if sys.platform != "win32":
+                        print("Install: brew install ffmpeg (macOS) or apt-get install ffmpeg (Linux)")
+                _ffmpeg_path = path
+    return _ffmpeg_path  # type: ignore[return-value]
+
+
+def is_ffmpeg_available() -> bool:
+    return get_ffmpeg_path() is not None
+
+
+def __getattr__(name: str):
+    if name == "ffmpeg_path":
+        return get_ffmpeg_path()
+    if name == "ffmpeg_available":
+        return is_ffmpeg_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None = None) -> bool:
@@ -110,7 +137,7 @@ def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None =
     Ensure ffmpeg is available. If not, and on Windows, download it.
     Returns True if ffmpeg is available (after download if necessary).
     """
-    global ffmpeg_path, ffmpeg_available, _cached_encoders
+    global _ffmpeg_path, _cached_encoders
 
     def emit(message: str) -> None:
         if log:
@@ -121,7 +148,7 @@ def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None =
         if interactive:
             print(message)
 
-    if ffmpeg_available:
+    if is_ffmpeg_available():
         return True
 
     if sys.platform != "win32":
@@ -159,7 +186,7 @@ def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None =
                 try:
                     target_path.parent.mkdir(parents=True, exist_ok=True)
                     with zip_ref.open(ffmpeg_exe_member) as source, open(target_path, "wb") as target:
-                        shutil.copyfileobj(source, target)
+                        shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
                     installed_to = target_path
                     break
                 except OSError:
@@ -174,10 +201,9 @@ def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None =
         os.unlink(tmp_zip)
 
         # Re-check
-        ffmpeg_path = _check_ffmpeg_available()
-        ffmpeg_available = ffmpeg_path is not None
+        _ffmpeg_path = _check_ffmpeg_available()
         _cached_encoders = None
-        return ffmpeg_available
+        return _ffmpeg_path is not None
 
     except Exception as e:
         emit(f"Failed to download FFmpeg: {e}")
@@ -186,7 +212,7 @@ def ensure_ffmpeg(interactive: bool = True, log: Callable[[str], None] | None =
 
 def get_available_encoders() -> list[str]:
     """Probe FFmpeg for available video encoders."""
-    if not ffmpeg_available:
+    if not is_ffmpeg_available():
         return []
 
     global _cached_encoders
@@ -195,7 +221,7 @@ def get_available_encoders() -> list[str]:
 
     try:
         # Run ffmpeg -encoders and look for h264 related ones
-        result = run_capture([ffmpeg_path or "ffmpeg", "-encoders"], timeout=5)
+        result = run_capture([get_ffmpeg_path() or "ffmpeg", "-encoders"], timeout=5)
         if result.returncode != 0:
             return []
         
@@ -215,13 +241,22 @@ def get_available_encoders() -> list[str]:
         return []
 
 
-_GPU_ENCODERS = {"h264_nvenc", "h264_amf", "h264_qsv"}
+_GPU_ENCODERS = {
+    "h264_nvenc",
+    "h264_amf",
+    "h264_qsv",
+    "h264_videotoolbox",
+    "h264_vaapi",
+}
 _H264_ENCODER_PRIORITY = [
+    "h264_videotoolbox",  # macOS
     "h264_nvenc",  # NVIDIA
     "h264_amf",    # AMD
     "h264_qsv",    # Intel
+    "h264_vaapi",  # Intel/AMD on Linux
     "libx264",     # Software (Fallback)
 ]
+VAAPI_DEVICE = "/dev/dri/renderD128"
 
 
 def is_gpu_encoder(encoder: str) -> bool:
@@ -244,6 +279,10 @@ def get_best_h264_encoder() -> str:
 
     for enc in _H264_ENCODER_PRIORITY:
         if enc in available:
+            # FFmpeg lists vaapi whenever it was built with it; it is only
+            # usable with a render node present.
+            if enc == "h264_vaapi" and not os.path.exists(VAAPI_DEVICE):
+                continue
             return enc
             
     return "libx264"
@@ -1,19 +1,126 @@
 from __future__ import annotations
 
-import io
+import os
+import shutil
 import zipfile
 from pathlib import Path
+from typing import BinaryIO
 
 from . import deps
 from .duplicates import DuplicateIndex, check_duplicate
-from .exif_utils import add_exif_metadata
-from .files import generate_filename, parse_date_to_timestamp, set_file_timestamp
-from .magic_bytes import detect_file_kind, extension_for_kind
+from .exif_utils import add_exif_metadata, build_exif_bytes
+from .fetch import fetch_content, open_zip
+from .files import (
+    COPY_BUFFER_SIZE,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    generate_filename,
+    write_file_atomic,
+)
+from .hashing import new_data_hasher, stored_hash
+from .http_session import DOWNLOAD_HEADERS
+from .magic_bytes import (
+    detect_file_kind,
+    extension_for_kind,
+    has_mp4_signature,
+    is_zip_file,
+    mp4_moov_before_mdat,
+)
 from .overlay import merge_image_overlay, merge_video_overlay
 
 
-def is_zip_file(content: bytes) -> bool:
-    return content[:2] == b"PK"
+# A faststart MP4 has only ftyp (and maybe free/uuid) ahead of moov; if moov
+# isn't among the boxes that start in this much, treat it as not pipeable.
+_MOOV_PEEK_SIZE = 64 << 10
+
+
+class _SaveContext:
+    """Naming, duplicate lookups and index bookkeeping for one memory's files."""
+
+    def __init__(
+        self,
+        base_path: Path,
+        file_num: str,
+        date_str: str,
+        latitude: str,
+        longitude: str,
+        use_timestamp_filenames: bool,
+        check_duplicates: bool,
+        duplicate_index: DuplicateIndex | None,
+    ) -> None:
+        self.base_path = base_path
+        self.file_num = file_num
+        self.date_str = date_str
+        self.latitude = latitude
+        self.longitude = longitude
+        self.use_timestamp_filenames = use_timestamp_filenames
+        self.check_duplicates = check_duplicates
+        self.duplicate_index = duplicate_index
+
+    def filename(self, extension: str, part: str | None = None) -> str:
+        name = generate_filename(
+            self.date_str, extension, self.use_timestamp_filenames, self.file_num
+        )
+        if part is None:
+            return name
+        return f"{name.rsplit('.', 1)[0]}-{part}{extension}"
+
+    def find_duplicate(
+        self, data: bytes, data_hash: str | None = None
+    ) -> tuple[str | None, str | None]:
+        """(name of an existing copy or None, hash of `data` if one was computed)."""
+        is_dup, dup_file, data_hash = check_duplicate(
+            data, self.base_path, self.check_duplicates, self.duplicate_index, data_hash
+        )
+        return (dup_file if is_dup else None), data_hash
+
+    def find_member_duplicate(
+        self, zf: zipfile.ZipFile, zip_info: zipfile.ZipInfo
+    ) -> tuple[str | None, str | None]:
+        if not self.check_duplicates:
+            return None, None
+        # The member is streamed to disk; only a size collision makes the
+        # index decompress it in memory.
+        is_dup, dup_file, data_hash = self.duplicate_index.check_zip_member(zf, zip_info)
+        return (dup_file if is_dup else None), data_hash
+
+    def duplicate(self, dup_file: str, size: int) -> dict:
+        print(f"    Skipped: Duplicate of existing file '{dup_file}'")
+        return {"path": dup_file, "size": size, "type": "duplicate", "duplicate_of": dup_file}
+
+    def save(
+        self,
+        filename: str,
+        data: bytes | BinaryIO,
+        size: int,
+        file_type: str,
+        data_hash: str | None,
+        deferred: bool = False,
+    ) -> dict:
+        output_path = self.base_path / filename
+        # Deferred parts are read back by the merge phase; keep them cached.
+        write_file_atomic(output_path, data, drop_cache=not deferred)
+        self.register(output_path, data_hash, size)
+        file_info = {"path": filename, "size": size, "type": file_type}
+        if deferred:
+            file_info["deferred"] = True
+        return _with_hash(file_info, data_hash)
+
+    def register(self, path: Path, data_hash: str | None, size: int) -> None:
+        if self.duplicate_index:
+            self.duplicate_index.register_file(path, data_hash=data_hash, size=size)
+
+    def unregister(self, path: Path) -> None:
+        if self.duplicate_index:
+            self.duplicate_index.unregister_file(path)
+
+
+def _with_hash(file_info: dict, data_hash: str | None) -> dict:
+    # Recorded only when duplicate checking hashed the file anyway; later
+    # duplicate scans reuse it instead of reading the file again.
+    if data_hash is not None:
+        file_info["hash"] = stored_hash(data_hash)
+    return file_info
 
 
 def download_and_extract(
@@ -30,315 +137,266 @@ def download_and_extract(
     use_timestamp_filenames: bool = False,
     check_duplicates: bool = False,
     duplicate_index: DuplicateIndex | None = None,
+    session: deps.requests.Session | None = None,
 ) -> list:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-
-    response = deps.requests.get(url, headers=headers, timeout=30)
-    response.raise_for_status()
-
-    content = response.content
-    files_saved: list[dict] = []
-
-    if len(content) < 100:
+    """
+    Download one memory and save its file(s) under `base_path`.
+
+    File timestamps are left to the caller, which sets them for every saved
+    file in one batch.
+    """
+    if check_duplicates and duplicate_index is None:
+        # A fresh index for this call: one folder scan serves every member,
+        # and nothing is remembered about files that may change afterwards.
+        duplicate_index = DuplicateIndex(base_path)
+
+    # Hash while the body streams in so an unmodified download is not re-read
+    # for the duplicate check.
+    hasher = new_data_hasher() if check_duplicates else None
+    part_path = base_path / f"{file_num}.part"
+    content, content_size, head = fetch_content(
+        session or deps.requests,
+        url,
+        DOWNLOAD_HEADERS,
+        hasher,
+        spool_to=part_path,
+        zip_only=overlays_only,
+    )
+    is_zip = is_zip_file(head)
+    if overlays_only and not is_zip:
+        # Only ZIP downloads carry an overlay; the rest of the body was never read.
+        return []
+    content_hash = hasher.hexdigest() if hasher is not None else None
+
+    if content_size < 100:
         print(
-            f"    WARNING: Downloaded file is very small ({len(content)} bytes) - may be invalid or expired URL"
+            f"    WARNING: Downloaded file is very small ({content_size} bytes) - may be invalid or expired URL"
         )
 
-    if is_zip_file(content):
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
-            filenames = zf.namelist()
-            has_overlay = any("-overlay" in f.lower() for f in filenames)
-
-            if overlays_only and not has_overlay:
-                return []
-
-            extracted_files: dict[str, dict] = {}
-            main_file = None
-            overlay_file = None
-
-            for zip_info in filenames:
-                file_data = zf.read(zip_info)
-                original_ext = Path(zip_info).suffix
-                if "-overlay" in zip_info.lower():
-                    overlay_file = file_data
-                    extracted_files["overlay"] = {"data": file_data, "ext": original_ext}
-                else:
-                    main_file = file_data
-                    extracted_files["main"] = {"data": file_data, "ext": original_ext}
-
-            main_ext = extracted_files.get("main", {}).get("ext") or extension
-            is_image = str(main_ext).lower() in [
-                ".jpg",
-                ".jpeg",
-                ".png",
-                ".webp",
-                ".gif",
-                ".bmp",
-                ".tiff",
-                ".tif",
-            ]
-            is_video = str(main_ext).lower() in [".mp4", ".mov", ".avi"]
-            merge_attempted = False
-
-            allow_inline_merge = (
-                merge_overlays
-                and has_overlay
-                and main_file
-                and overlay_file
-                and not defer_video_overlays
+    ctx = _SaveContext(
+        base_path,
+        file_num,
+        date_str,
+        latitude,
+        longitude,
+        use_timestamp_filenames,
+        check_duplicates,
+        duplicate_index,
+    )
+    if is_zip:
+        with open_zip(content, part_path) as zf:
+            return _save_zip(
+                zf, ctx, extension, merge_overlays, defer_video_overlays, overlays_only
             )
+    if content is None:
+        return [_save_spooled_video(ctx, part_path, head, content_size, content_hash, extension)]
+    return [_save_content(ctx, content, content_hash, extension)]
 
-            if allow_inline_merge:
-                if is_image and deps.Image is not None:
-                    try:
-                        merged_data = merge_image_overlay(main_file, overlay_file)
-                        merged_data = add_exif_metadata(
-                            merged_data, date_str, latitude, longitude
-                        )
-
-                        is_dup, dup_file, data_hash = check_duplicate(
-                            merged_data, base_path, check_duplicates, duplicate_index
-                        )
-                        if is_dup and dup_file:
-                            print(f"    Skipped: Duplicate of existing file '{dup_file}'")
-                            files_saved.append(
-                                {
-                                    "path": dup_file,
-                                    "size": len(merged_data),
-                                    "type": "duplicate",
-                                    "duplicate_of": dup_file,
-                                }
-                            )
-                            merge_attempted = True
-                        else:
-                            output_filename = generate_filename(
-                                date_str, extension, use_timestamp_filenames, file_num
-                            )
-                            output_path = base_path / output_filename
-                            with open(output_path, "wb") as f:
-                                f.write(merged_data)
-                            if duplicate_index:
-                                duplicate_index.register_file(
-                                    output_path,
-                                    data_hash=data_hash,
-                                    size=len(merged_data),
-                                )
-                            files_saved.append(
-                                {
-                                    "path": output_filename,
-                                    "size": len(merged_data),
-                                    "type": "merged",
-                                }
-                            )
-                            merge_attempted = True
-                    except Exception as e:
-                        print(f"    Warning: Failed to merge image overlay: {e}")
-                        print("    Saving separate files instead...")
-                        merge_overlays = False
-
-                elif is_video and deps.ffmpeg_available:
-                    try:
-                        main_ext = extracted_files.get("main", {}).get("ext") or extension
-                        overlay_ext = extracted_files.get("overlay", {}).get("ext") or ".png"
-
-                        temp_main = base_path / f"{file_num}-temp-main{main_ext}"
-                        temp_overlay = base_path / f"{file_num}-temp-overlay{overlay_ext}"
-                        output_filename = generate_filename(
-                            date_str, str(main_ext), use_timestamp_filenames, file_num
-                        )
-                        output_path = base_path / output_filename
-
-                        with open(temp_main, "wb") as f:
-                            f.write(main_file)
-                        with open(temp_overlay, "wb") as f:
-                            f.write(overlay_file)
-
-                        print("    Merging video overlay (this may take a while)...")
-                        success = merge_video_overlay(temp_main, temp_overlay, output_path)
-
-                        if success:
-                            files_saved.append(
-                                {
-                                    "path": output_filename,
-                                    "size": output_path.stat().st_size,
-                                    "type": "merged",
-                                }
-                            )
-                            print(f"    Merged video: {output_filename}")
-
-                            timestamp = parse_date_to_timestamp(date_str)
-                            set_file_timestamp(output_path, timestamp)
-
-                            base_filename = generate_filename(
-                                date_str, extension, use_timestamp_filenames, file_num
-                            )
-                            base_name_no_ext = base_filename.rsplit(".", 1)[0]
-
-                            for potential_main in base_path.glob(
-                                f"{base_name_no_ext}-main.*"
-                            ):
-                                if duplicate_index:
-                                    duplicate_index.unregister_file(potential_main)
-                                potential_main.unlink()
-                                print(f"    Deleted separate file: {potential_main.name}")
-
-                            for potential_overlay in base_path.glob(
-                                f"{base_name_no_ext}-overlay.*"
-                            ):
-                                if duplicate_index:
-                                    duplicate_index.unregister_file(potential_overlay)
-                                potential_overlay.unlink()
-                                print(f"    Deleted separate file: {potential_overlay.name}")
-
-                            merge_attempted = True
-                        else:
-                            print(
-                                "    Warning: Video merge failed, saving separate files instead..."
-                            )
-                            merge_overlays = False
-
-                        temp_main.unlink(missing_ok=True)
-                        temp_overlay.unlink(missing_ok=True)
-
-                    except Exception as e:
-                        print(f"    Warning: Failed to merge video overlay: {e}")
-                        print("    Saving separate files instead...")
-                        if "temp_main" in locals():
-                            temp_main.unlink(missing_ok=True)  # type: ignore[name-defined]
-                        if "temp_overlay" in locals():
-                            temp_overlay.unlink(missing_ok=True)  # type: ignore[name-defined]
-                        merge_overlays = False
-
-            if not merge_attempted:
-                is_deferred = (
-                    merge_overlays
-                    and has_overlay
-                    and main_file
-                    and overlay_file
-                    and defer_video_overlays
-                )
-                if is_deferred:
-                    print("    Deferring overlay merge until end")
-
-                for file_type, file_info in extracted_files.items():
-                    file_data = file_info["data"]
-                    file_ext = file_info["ext"]
-
-                    is_image_file = file_ext.lower() in [
-                        ".jpg",
-                        ".jpeg",
-                        ".png",
-                        ".webp",
-                        ".gif",
-                        ".bmp",
-                        ".tiff",
-                        ".tif",
-                    ]
-                    if is_image_file:
-                        file_data = add_exif_metadata(
-                            file_data, date_str, latitude, longitude
-                        )
-
-                    is_dup, dup_file, data_hash = check_duplicate(
-                        file_data, base_path, check_duplicates, duplicate_index
-                    )
-                    if is_dup and dup_file:
-                        print(f"    Skipped: Duplicate of existing file '{dup_file}'")
-                        file_info_dict: dict = {
-                            "path": dup_file,
-                            "size": len(file_data),
-                            "type": "duplicate",
-                            "duplicate_of": dup_file,
-                        }
-                        files_saved.append(file_info_dict)
-                    else:
-                        base_filename = generate_filename(
-                            date_str, file_ext, use_timestamp_filenames, file_num
-                        )
-                        base_name_no_ext = base_filename.rsplit(".", 1)[0]
-
-                        if file_type == "overlay":
-                            output_filename = f"{base_name_no_ext}-overlay{file_ext}"
-                        else:
-                            output_filename = f"{base_name_no_ext}-main{file_ext}"
-
-                        output_path = base_path / output_filename
-                        with open(output_path, "wb") as f:
-                            f.write(file_data)
-                        if duplicate_index:
-                            duplicate_index.register_file(
-                                output_path,
-                                data_hash=data_hash,
-                                size=len(file_data),
-                            )
-
-                        timestamp = parse_date_to_timestamp(date_str)
-                        set_file_timestamp(output_path, timestamp)
-
-                        file_info_dict = {
-                            "path": output_filename,
-                            "size": len(file_data),
-                            "type": file_type,
-                        }
-                        if is_deferred:
-                            file_info_dict["deferred"] = True
-                        files_saved.append(file_info_dict)
 
+def _save_spooled_video(
+    ctx: _SaveContext,
+    part_path: Path,
+    head: bytes,
+    size: int,
+    data_hash: str | None,
+    extension: str,
+) -> dict:
+    if ctx.duplicate_index is not None:
+        is_dup, dup_file, data_hash = ctx.duplicate_index.check_file(part_path, size, data_hash)
+        if is_dup and dup_file:
+            part_path.unlink(missing_ok=True)
+            return ctx.duplicate(dup_file, size)
+
+    output_filename = ctx.filename(extension_for_kind(detect_file_kind(head), extension))
+    output_path = ctx.base_path / output_filename
+    os.replace(part_path, output_path)
+    ctx.register(output_path, data_hash, size)
+    return _with_hash({"path": output_filename, "size": size, "type": "single"}, data_hash)
+
+
+def _save_content(
+    ctx: _SaveContext, content: bytes, content_hash: str | None, extension: str
+) -> dict:
+    detected_ext = extension_for_kind(detect_file_kind(content), extension)
+
+    is_video = detected_ext.lower() in VIDEO_EXTENSIONS
+    if is_video and len(content) >= 8 and not has_mp4_signature(content):
+        print("    WARNING: File may not be a valid video (invalid MP4 signature)")
+        print(f"    First 20 bytes: {content[:20]}")
+        print("    This might be an HTML error page or expired download link")
+
+    if detected_ext.lower() in IMAGE_EXTENSIONS:
+        tagged = add_exif_metadata(content, ctx.date_str, ctx.latitude, ctx.longitude)
+        if tagged is not content:
+            content = tagged
+            content_hash = None
+
+    dup_file, data_hash = ctx.find_duplicate(content, content_hash)
+    if dup_file:
+        return ctx.duplicate(dup_file, len(content))
+    return ctx.save(ctx.filename(detected_ext), content, len(content), "single", data_hash)
+
+
+def _save_zip(
+    zf: zipfile.ZipFile,
+    ctx: _SaveContext,
+    extension: str,
+    merge_overlays: bool,
+    defer_video_overlays: bool,
+    overlays_only: bool,
+) -> list:
+    # Classify entries from the central directory before reading any data,
+    # so overlays-only runs can bail out without decompressing.
+    members: dict[str, zipfile.ZipInfo] = {}
+    for zip_info in zf.infolist():
+        members["overlay" if "-overlay" in zip_info.filename.lower() else "main"] = zip_info
+
+    if overlays_only and "overlay" not in members:
+        return []
+
+    mergeable = merge_overlays and all(
+        part in members and members[part].file_size > 0 for part in ("main", "overlay")
+    )
+    if mergeable and not defer_video_overlays:
+        merged = _merge_inline(zf, members, ctx, extension)
+        if merged is not None:
+            return merged
+
+    is_deferred = mergeable and defer_video_overlays
+    if is_deferred:
+        print("    Deferring overlay merge until end")
+    return [
+        _save_member(zf, zip_info, file_type, ctx, is_deferred)
+        for file_type, zip_info in members.items()
+    ]
+
+
+def _save_member(
+    zf: zipfile.ZipFile,
+    zip_info: zipfile.ZipInfo,
+    file_type: str,
+    ctx: _SaveContext,
+    is_deferred: bool,
+) -> dict:
+    # Members are only decompressed into memory where something needs the
+    # bytes; plain saves are streamed straight to disk.
+    file_ext = Path(zip_info.filename).suffix
+    if file_ext.lower() in IMAGE_EXTENSIONS:
+        file_data = add_exif_metadata(
+            zf.read(zip_info), ctx.date_str, ctx.latitude, ctx.longitude
+        )
+        dup_file, data_hash = ctx.find_duplicate(file_data)
+        file_size = len(file_data)
     else:
-        if overlays_only:
-            return []
-
-        kind = detect_file_kind(content)
-        detected_ext = extension_for_kind(kind, extension)
-
-        is_video = detected_ext.lower() in [".mp4", ".mov", ".avi"]
-        if is_video and len(content) >= 8:
-            if content[4:8] not in [b"ftyp", b"mdat", b"moov", b"wide"]:
-                print("    WARNING: File may not be a valid video (invalid MP4 signature)")
-                print(f"    First 20 bytes: {content[:20]}")
-                print("    This might be an HTML error page or expired download link")
-
-        is_image = detected_ext.lower() in [
-            ".jpg",
-            ".jpeg",
-            ".png",
-            ".webp",
-            ".gif",
-            ".bmp",
-            ".tiff",
-            ".tif",
+        file_data = None
+        dup_file, data_hash = ctx.find_member_duplicate(zf, zip_info)
+        file_size = zip_info.file_size
+    if dup_file:
+        return ctx.duplicate(dup_file, file_size)
+
+    output_filename = ctx.filename(file_ext, file_type)
+    if file_data is not None:
+        return ctx.save(output_filename, file_data, file_size, file_type, data_hash, is_deferred)
+    with zf.open(zip_info) as src:
+        return ctx.save(output_filename, src, file_size, file_type, data_hash, is_deferred)
+
+
+def _merge_inline(
+    zf: zipfile.ZipFile, members: dict[str, zipfile.ZipInfo], ctx: _SaveContext, extension: str
+) -> list | None:
+    """Merge the overlay while the ZIP is open; None means save the parts separately."""
+    main_ext = Path(members["main"].filename).suffix or extension
+    if main_ext.lower() in IMAGE_EXTENSIONS and deps.Image is not None:
+        return _merge_image_inline(zf, members, ctx, extension)
+    if main_ext.lower() in VIDEO_EXTENSIONS and deps.ffmpeg_available:
+        return _merge_video_inline(zf, members, ctx, main_ext, extension)
+    return None
+
+
+def _merge_image_inline(
+    zf: zipfile.ZipFile, members: dict[str, zipfile.ZipInfo], ctx: _SaveContext, extension: str
+) -> list | None:
+    try:
+        merged_data = merge_image_overlay(
+            zf.read(members["main"]),
+            zf.read(members["overlay"]),
+            build_exif_bytes(ctx.date_str, ctx.latitude, ctx.longitude),
+        )
+        dup_file, data_hash = ctx.find_duplicate(merged_data)
+        if dup_file:
+            return [ctx.duplicate(dup_file, len(merged_data))]
+        return [
+            ctx.save(ctx.filename(extension), merged_data, len(merged_data), "merged", data_hash)
         ]
-        if is_image:
-            content = add_exif_metadata(content, date_str, latitude, longitude)
+    except Exception as e:
+        print(f"    Warning: Failed to merge image overlay: {e}")
+        print("    Saving separate files instead...")
+        return None
 
-        is_dup, dup_file, data_hash = check_duplicate(
-            content, base_path, check_duplicates, duplicate_index
-        )
-        if is_dup and dup_file:
-            print(f"    Skipped: Duplicate of existing file '{dup_file}'")
-            files_saved.append(
-                {
-                    "path": dup_file,
-                    "size": len(content),
-                    "type": "duplicate",
-                    "duplicate_of": dup_file,
-                }
-            )
-        else:
-            output_filename = generate_filename(
-                date_str, detected_ext, use_timestamp_filenames, file_num
-            )
-            output_path = base_path / output_filename
-            with open(output_path, "wb") as f:
-                f.write(content)
-            if duplicate_index:
-                duplicate_index.register_file(
-                    output_path,
-                    data_hash=data_hash,
-                    size=len(content),
-                )
-            files_saved.append({"path": output_filename, "size": len(content), "type": "single"})
-
-    return files_saved
+
+def _merge_video_inline(
+    zf: zipfile.ZipFile,
+    members: dict[str, zipfile.ZipInfo],
+    ctx: _SaveContext,
+    main_ext: str,
+    extension: str,
+) -> list | None:
+    overlay_ext = Path(members["overlay"].filename).suffix or ".png"
+    temp_main = ctx.base_path / f"{ctx.file_num}-temp-main{main_ext}"
+    temp_overlay = ctx.base_path / f"{ctx.file_num}-temp-overlay{overlay_ext}"
+    output_filename = ctx.filename(main_ext)
+    output_path = ctx.base_path / output_filename
+    try:
+        if not _run_video_merge(zf, members, temp_main, temp_overlay, output_path):
+            print("    Warning: Video merge failed, saving separate files instead...")
+            return None
+        merged = {"path": output_filename, "size": output_path.stat().st_size, "type": "merged"}
+        print(f"    Merged video: {output_filename}")
+        _remove_separate_parts(ctx, extension)
+        return [merged]
+    except Exception as e:
+        print(f"    Warning: Failed to merge video overlay: {e}")
+        print("    Saving separate files instead...")
+        return None
+    finally:
+        temp_main.unlink(missing_ok=True)
+        temp_overlay.unlink(missing_ok=True)
+
+
+def _run_video_merge(
+    zf: zipfile.ZipFile,
+    members: dict[str, zipfile.ZipInfo],
+    temp_main: Path,
+    temp_overlay: Path,
+    output_path: Path,
+) -> bool:
+    # A faststart MP4 can be piped to ffmpeg; otherwise it needs a seekable
+    # file. The overlay is looped, so it always goes to disk. Only the head of
+    # the main video is read to decide; files are streamed, not read whole.
+    with zf.open(members["main"]) as src:
+        head = src.read(_MOOV_PEEK_SIZE)
+        pipe_main = mp4_moov_before_mdat(head)
+        if not pipe_main:
+            with open(temp_main, "wb") as f:
+                f.write(head)
+                shutil.copyfileobj(src, f, COPY_BUFFER_SIZE)
+    with zf.open(members["overlay"]) as src, open(temp_overlay, "wb") as f:
+        shutil.copyfileobj(src, f, COPY_BUFFER_SIZE)
+
+    print("    Merging video overlay (this may take a while)...")
+    if not pipe_main:
+        return merge_video_overlay(temp_main, temp_overlay, output_path)
+    # Decompressed straight into ffmpeg's stdin; the main video never touches
+    # disk or sits in memory.
+    with zf.open(members["main"]) as main_stream:
+        return merge_video_overlay(None, temp_overlay, output_path, main_data=main_stream)
+
+
+def _remove_separate_parts(ctx: _SaveContext, extension: str) -> None:
+    """Delete -main/-overlay files an earlier run left for this memory."""
+    stem = ctx.filename(extension).rsplit(".", 1)[0]
+    for part in ("main", "overlay"):
+        for path in ctx.base_path.glob(f"{stem}-{part}.*"):
+            ctx.unregister(path)
+            path.unlink()
+            print(f"    Deleted separate file: {path.name}")
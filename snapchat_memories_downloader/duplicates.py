@@ -1,9 +1,28 @@
 from __future__ import annotations
 
-import hashlib
+import os
 import threading
+import zipfile
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .hashing import (
+    HASH_CACHE_NAME,
+    QUICK_HASH_WINDOW,
+    compute_data_hash,
+    compute_file_hash,
+    compute_quick_data_hash,
+    compute_quick_file_hash,
+    load_hash_cache,
+    load_known_hashes,
+    save_hash_cache,
+)
+
+
+# Bookkeeping files in the output folder that are never media.
+_NON_MEDIA_NAMES = frozenset({"metadata.json", HASH_CACHE_NAME})
+
 
 class DuplicateIndex:
     def __init__(self, output_path: Path) -> None:
@@ -13,48 +32,127 @@ class DuplicateIndex:
         self._size_to_paths: dict[int, set[Path]] = {}
         self._size_hash_to_path: dict[int, dict[str, Path]] = {}
         self._path_hash: dict[Path, str] = {}
+        self._path_quick_hash: dict[Path, str] = {}
 
     def build(self) -> None:
         self._ensure_initialized()
 
-    def check_data(self, data: bytes) -> tuple[bool, str | None, str]:
+    def check_data(
+        self, data: bytes, data_hash: str | None = None
+    ) -> tuple[bool, str | None, str | None]:
+        """Look `data` up in the index; the returned hash is None when hashing was skipped."""
+        return self._check(
+            len(data),
+            data_hash,
+            lambda: compute_quick_data_hash(data),
+            lambda: compute_data_hash(data),
+        )
+
+    def check_file(
+        self, path: Path, size: int, data_hash: str | None = None
+    ) -> tuple[bool, str | None, str | None]:
+        """Like `check_data` for content already on disk at `path` (not yet indexed)."""
+        return self._check(
+            size,
+            data_hash,
+            lambda: compute_quick_file_hash(path),
+            lambda: compute_file_hash(path),
+        )
+
+    def check_zip_member(
+        self, zf: zipfile.ZipFile, info: zipfile.ZipInfo
+    ) -> tuple[bool, str | None, str | None]:
+        """
+        Like `check_data` for an archive member. The size comes from the
+        central directory, so the member is only decompressed (once) when a
+        same-size file is already on disk.
+        """
+        data: bytes | None = None
+
+        def read() -> bytes:
+            nonlocal data
+            if data is None:
+                data = zf.read(info)
+            return data
+
+        return self._check(
+            info.file_size,
+            None,
+            lambda: compute_quick_data_hash(read()),
+            lambda: compute_data_hash(read()),
+        )
+
+    def _check(
+        self,
+        size: int,
+        data_hash: str | None,
+        quick_hash: Callable[[], str],
+        full_hash: Callable[[], str],
+    ) -> tuple[bool, str | None, str | None]:
         self._ensure_initialized()
-        size = len(data)
-        data_hash = compute_data_hash(data)
 
+        with self._lock:
+            candidate_paths = list(self._size_to_paths.get(size, set()))
+
+        if not candidate_paths:
+            # Nothing on disk has this size, so it cannot be a duplicate.
+            return False, None, data_hash
+
+        if data_hash is None and size > 2 * QUICK_HASH_WINDOW:
+            # Rule out same-size files by a few sampled windows before paying
+            # for a full hash of the download (and of every candidate).
+            quick = quick_hash()
+            candidate_paths = [
+                path
+                for path in candidate_paths
+                if self._quick_hash_for(path) in (quick, None)
+            ]
+            if not candidate_paths:
+                return False, None, None
+
+        if data_hash is None:
+            data_hash = full_hash()
+
+        match = self._find_match(size, data_hash, candidate_paths)
+        return match is not None, match, data_hash
+
+    def _find_match(self, size: int, data_hash: str, candidate_paths: list[Path]) -> str | None:
+        """Name of an indexed file with this size and hash, if one still exists."""
         with self._lock:
             hash_map = self._size_hash_to_path.get(size, {})
             cached_path = hash_map.get(data_hash)
-            candidate_paths = list(self._size_to_paths.get(size, set()))
 
         if cached_path:
             if cached_path.exists():
-                return True, cached_path.name, data_hash
+                return cached_path.name
             self._remove_path(cached_path, size)
 
         for path in candidate_paths:
-            if not path.exists():
-                self._remove_path(path, size)
-                continue
-
-            with self._lock:
-                existing_hash = self._path_hash.get(path)
+            if self._hash_for(path, size) == data_hash:
+                return path.name
+        return None
 
-            if existing_hash is None:
-                try:
-                    existing_hash = compute_file_hash(path)
-                except Exception:
-                    self._remove_path(path, size)
-                    continue
+    def _hash_for(self, path: Path, size: int) -> str | None:
+        """Full hash of an indexed file, computed once; None drops a vanished file."""
+        if not path.exists():
+            self._remove_path(path, size)
+            return None
 
-                with self._lock:
-                    self._path_hash[path] = existing_hash
-                    self._size_hash_to_path.setdefault(size, {})[existing_hash] = path
+        with self._lock:
+            existing_hash = self._path_hash.get(path)
+        if existing_hash is not None:
+            return existing_hash
 
-            if existing_hash == data_hash:
-                return True, path.name, data_hash
+        try:
+            existing_hash = compute_file_hash(path)
+        except Exception:
+            self._remove_path(path, size)
+            return None
 
-        return False, None, data_hash
+        with self._lock:
+            self._path_hash[path] = existing_hash
+            self._size_hash_to_path.setdefault(size, {})[existing_hash] = path
+        return existing_hash
 
     def register_file(
         self,
@@ -74,6 +172,21 @@ class DuplicateIndex:
         with self._lock:
             self._add_path_locked(path, size=size, data_hash=data_hash)
 
+    def _quick_hash_for(self, path: Path) -> str | None:
+        """Sampled quick hash of an indexed file; None if it is fully hashed already or unreadable."""
+        with self._lock:
+            if path in self._path_hash:
+                return None
+            quick = self._path_quick_hash.get(path)
+        if quick is None:
+            try:
+                quick = compute_quick_file_hash(path)
+            except OSError:
+                return None
+            with self._lock:
+                self._path_quick_hash[path] = quick
+        return quick
+
     def unregister_file(self, path: Path) -> None:
         self._remove_path(path)
 
@@ -87,10 +200,24 @@ class DuplicateIndex:
             self._initialized = True
 
     def _build_locked(self) -> None:
-        if not self._output_path.exists():
+        # scandir hands back the file type with each entry, so only the size
+        # needs a stat call.
+        try:
+            with os.scandir(self._output_path) as entries:
+                for entry in entries:
+                    if (
+                        entry.name in _NON_MEDIA_NAMES
+                        or entry.name.endswith(".part")
+                        or not entry.is_file()
+                    ):
+                        continue
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
+                    self._size_to_paths.setdefault(size, set()).add(Path(entry.path))
+        except FileNotFoundError:
             return
-        for path in self._output_path.iterdir():
-            self._add_path_locked(path)
 
     def _add_path_locked(
         self,
@@ -99,7 +226,7 @@ class DuplicateIndex:
         size: int | None = None,
         data_hash: str | None = None,
     ) -> None:
-        if not path.is_file() or path.name == "metadata.json":
+        if not path.is_file() or path.name in _NON_MEDIA_NAMES:
             return
         if size is None:
             try:
@@ -126,6 +253,7 @@ class DuplicateIndex:
                     if not paths:
                         self._size_to_paths.pop(size, None)
 
+            self._path_quick_hash.pop(path, None)
             existing_hash = self._path_hash.pop(path, None)
             if existing_hash and size is not None:
                 hash_map = self._size_hash_to_path.get(size)
@@ -135,35 +263,30 @@ class DuplicateIndex:
                         self._size_hash_to_path.pop(size, None)
 
 
-def compute_file_hash(file_path: Path) -> str:
-    md5_hash = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            md5_hash.update(chunk)
-    return md5_hash.hexdigest()
-
-
-def compute_data_hash(data: bytes) -> str:
-    return hashlib.md5(data).hexdigest()
-
-
 def is_duplicate_file(
-    data: bytes, output_path: Path, check_duplicates: bool
+    data: bytes,
+    output_path: Path,
+    check_duplicates: bool,
+    data_hash: str | None = None,
 ) -> tuple[bool, str | None]:
     if not check_duplicates:
         return (False, None)
 
-    new_hash = compute_data_hash(data)
+    # Hash the new data only once a same-size file turns up.
+    new_hash = data_hash
     new_size = len(data)
 
-    for existing_file in output_path.iterdir():
-        if existing_file.is_file() and existing_file.name != "metadata.json":
+    with os.scandir(output_path) as entries:
+        for entry in entries:
+            if entry.name in _NON_MEDIA_NAMES:
+                continue
             try:
-                existing_size = existing_file.stat().st_size
-                if existing_size == new_size:
-                    existing_hash = compute_file_hash(existing_file)
-                    if existing_hash == new_hash:
-                        return (True, existing_file.name)
+                if not entry.is_file() or entry.stat().st_size != new_size:
+                    continue
+                if new_hash is None:
+                    new_hash = compute_data_hash(data)
+                if compute_file_hash(Path(entry.path)) == new_hash:
+                    return (True, entry.name)
             except Exception:
                 continue
 
@@ -175,16 +298,125 @@ def check_duplicate(
     output_path: Path,
     check_duplicates: bool,
     duplicate_index: DuplicateIndex | None = None,
+    data_hash: str | None = None,
 ) -> tuple[bool, str | None, str | None]:
     if not check_duplicates:
         return (False, None, None)
 
     if duplicate_index is not None:
-        is_dup, dup_name, data_hash = duplicate_index.check_data(data)
+        is_dup, dup_name, data_hash = duplicate_index.check_data(data, data_hash)
         return (is_dup, dup_name, data_hash)
 
-    is_dup, dup_name = is_duplicate_file(data, output_path, check_duplicates)
-    return (is_dup, dup_name, None)
+    is_dup, dup_name = is_duplicate_file(
+        data, output_path, check_duplicates, data_hash
+    )
+    return (is_dup, dup_name, data_hash)
+
+
+def _hash_files(
+    paths: list[Path],
+    file_info: dict[Path, dict],
+    *,
+    key: str = "hash",
+    hash_fn: Callable[[Path], str] | None = None,
+) -> None:
+    """Store `hash_fn(path)` (default: full hash) under `file_info[path][key]`; unreadable files lose the key."""
+    if not paths:
+        return
+    hash_fn = hash_fn or compute_file_hash
+    # Hashing releases the GIL, so threads overlap disk reads and digesting.
+    workers = min(32, (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {file_path: pool.submit(hash_fn, file_path) for file_path in paths}
+
+    for file_path, future in futures.items():
+        info = file_info[file_path]
+        if key == "hash":
+            info.pop("cached", None)
+        try:
+            info[key] = future.result()
+        except Exception as e:
+            info.pop(key, None)
+            print(f"  Warning: Could not analyze {file_path.name}: {e}")
+
+
+def _group_by_hash(file_info: dict[Path, dict]) -> dict[tuple, list[Path]]:
+    # Walk in listing order so the first file of each group is still kept.
+    groups: dict[tuple, list[Path]] = {}
+    for file_path, info in file_info.items():
+        if "hash" not in info:
+            continue
+        key = (info["hash"], info["size"])
+        groups.setdefault(key, []).append(file_path)
+    return {k: v for k, v in groups.items() if len(v) > 1}
+
+
+def _find_duplicate_groups(
+    folder_path: Path, file_info: dict[Path, dict], size_counts: dict[int, int]
+) -> dict[tuple, list[Path]]:
+    # Only files that share their size with another file can be duplicates,
+    # so everything else is never read.
+    same_size = [path for path, info in file_info.items() if size_counts[info["size"]] > 1]
+
+    # Large same-size files are first compared by a sampled fingerprint; only
+    # those whose samples also collide are read in full.
+    sampled = [path for path in same_size if file_info[path]["size"] > 2 * QUICK_HASH_WINDOW]
+    _hash_files(sampled, file_info, key="quick", hash_fn=compute_quick_file_hash)
+    sample_counts: dict[tuple, int] = {}
+    for path in sampled:
+        if "quick" in file_info[path]:
+            sample_key = (file_info[path]["size"], file_info[path]["quick"])
+            sample_counts[sample_key] = sample_counts.get(sample_key, 0) + 1
+
+    # Hashes from earlier scans (unchanged size and mtime) or recorded at
+    # download time (unchanged size) stand in for reading a file.
+    cached_hashes = load_hash_cache(folder_path)
+    known_hashes = load_known_hashes(folder_path)
+    candidates = []
+    for file_path in same_size:
+        info = file_info[file_path]
+        if info["size"] > 2 * QUICK_HASH_WINDOW and sample_counts.get(
+            (info["size"], info.get("quick")), 0
+        ) < 2:
+            continue
+        cached = cached_hashes.get(file_path.name)
+        known = known_hashes.get(file_path.name)
+        if cached is not None and cached[:2] == [info["size"], info["mtime_ns"]]:
+            info["hash"] = cached[2]
+            info["cached"] = HASH_CACHE_NAME
+        elif known is not None and known[1] == info["size"]:
+            info["hash"] = known[0]
+            info["cached"] = "metadata.json"
+        else:
+            candidates.append(file_path)
+    _hash_files(candidates, file_info)
+
+    # A reused hash only ever saves reading files that turn out unique;
+    # anything about to be deleted on its strength is hashed for real first.
+    duplicate_groups = _group_by_hash(file_info)
+    unverified = [
+        path for paths in duplicate_groups.values() for path in paths if file_info[path].get("cached")
+    ]
+    if unverified:
+        _hash_files(unverified, file_info)
+        duplicate_groups = _group_by_hash(file_info)
+
+    _save_hash_cache(folder_path, file_info, duplicate_groups)
+    return duplicate_groups
+
+
+def _save_hash_cache(
+    folder_path: Path, file_info: dict[Path, dict], duplicate_groups: dict[tuple, list[Path]]
+) -> None:
+    # Files about to be deleted are left out, as are metadata.json hashes,
+    # which were never checked against the file's mtime.
+    deleted = {path for paths in duplicate_groups.values() for path in paths[1:]}
+    files = {
+        path.name: [info["size"], info["mtime_ns"], info["hash"]]
+        for path, info in file_info.items()
+        if "hash" in info and info.get("cached") != "metadata.json" and path not in deleted
+    }
+    save_hash_cache(folder_path, files)
 
 
 def detect_and_remove_duplicates(folder_path: Path) -> dict:
@@ -192,29 +424,29 @@ def detect_and_remove_duplicates(folder_path: Path) -> dict:
     print("Scanning for duplicate files...")
     print("=" * 60)
 
-    all_files = [f for f in folder_path.iterdir() if f.is_file() and f.name != "metadata.json"]
+    # One scandir pass: the entry's cached d_type answers is_file() and its
+    # single stat() call supplies the size, so no file is stat'ed twice.
+    file_info: dict[Path, dict] = {}
+    size_counts: dict[int, int] = {}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name in _NON_MEDIA_NAMES or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError as e:
+                print(f"  Warning: Could not analyze {entry.name}: {e}")
+                continue
+            file_info[Path(entry.path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            size_counts[stat.st_size] = size_counts.get(stat.st_size, 0) + 1
 
-    if not all_files:
+    if not file_info:
         print("No files found to check for duplicates")
         return {"duplicates_found": 0, "files_deleted": 0, "space_saved": 0}
 
-    file_info: dict[Path, dict] = {}
-    print(f"Analyzing {len(all_files)} files...")
-
-    for file_path in all_files:
-        try:
-            stat = file_path.stat()
-            md5 = compute_file_hash(file_path)
-            file_info[file_path] = {"md5": md5, "size": stat.st_size, "mtime": stat.st_mtime}
-        except Exception as e:
-            print(f"  Warning: Could not analyze {file_path.name}: {e}")
-
-    groups: dict[tuple, list[Path]] = {}
-    for file_path, info in file_info.items():
-        key = (info["md5"], info["size"], info["mtime"])
-        groups.setdefault(key, []).append(file_path)
+    print(f"Analyzing {len(file_info)} files...")
 
-    duplicate_groups = {k: v for k, v in groups.items() if len(v) > 1}
+    duplicate_groups = _find_duplicate_groups(folder_path, file_info, size_counts)
 
     if not duplicate_groups:
         print("No duplicate files found!")
@@ -226,9 +458,9 @@ def detect_and_remove_duplicates(folder_path: Path) -> dict:
 
     print(f"\nFound {len(duplicate_groups)} duplicate group(s):")
 
-    for (md5, size, _mtime), file_list in duplicate_groups.items():
+    for (file_hash, size), file_list in duplicate_groups.items():
         total_duplicates += len(file_list)
-        print(f"\n  Duplicate group (MD5: {md5[:8]}..., Size: {size:,} bytes):")
+        print(f"\n  Duplicate group (Hash: {file_hash[:8]}..., Size: {size:,} bytes):")
 
         keep_file = file_list[0]
         print(f"    KEEP: {keep_file.name}")
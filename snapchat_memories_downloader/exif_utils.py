@@ -1,18 +1,178 @@
 from __future__ import annotations
 
 import io
-from datetime import datetime
+import struct
+import zlib
+from functools import lru_cache
 
 from .deps import Image, piexif
+from .magic_bytes import detect_file_kind
 
 
 def decimal_to_dms(decimal: float) -> tuple:
-    decimal = abs(decimal)
-    degrees = int(decimal)
-    minutes_decimal = (decimal - degrees) * 60
-    minutes = int(minutes_decimal)
-    seconds = (minutes_decimal - minutes) * 60
-    return ((degrees, 1), (minutes, 1), (int(seconds * 100), 100))
+    # Scale to hundredths of a second once and split with integer divmod; the
+    # repeated float subtract-and-truncate steps lost a hundredth on values
+    # like 157.04 (2'23.99" instead of 2'24.00").
+    hundredths = int(abs(decimal) * 360000)
+    degrees, rem = divmod(hundredths, 360000)
+    minutes, hundredths = divmod(rem, 6000)
+    return ((degrees, 1), (minutes, 1), (hundredths, 100))
+
+
+def _exif_date(date_str: str) -> bytes | None:
+    """'YYYY-MM-DD HH:MM:SS[ UTC]' -> b'YYYY:MM:DD HH:MM:SS' by slicing, without strptime."""
+    s = date_str[:-4] if date_str.endswith(" UTC") else date_str
+    if len(s) != 19 or s[4] != "-" or s[7] != "-" or s[10] != " " or s[13] != ":" or s[16] != ":":
+        return None
+    digits = s[:4] + s[5:7] + s[8:10] + s[11:13] + s[14:16] + s[17:]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    return f"{s[:4]}:{s[5:7]}:{s[8:10]} {s[11:]}".encode()
+
+
+@lru_cache(maxsize=4096)
+def _gps_entries(latitude: str, longitude: str) -> tuple:
+    # Exports repeat the same coordinates across many memories; convert each
+    # pair once. Raises ValueError for non-numeric input, which is not cached.
+    lat = float(latitude)
+    lon = float(longitude)
+    return (
+        (piexif.GPSIFD.GPSLatitude, decimal_to_dms(lat)),
+        (piexif.GPSIFD.GPSLatitudeRef, b"N" if lat >= 0 else b"S"),
+        (piexif.GPSIFD.GPSLongitude, decimal_to_dms(lon)),
+        (piexif.GPSIFD.GPSLongitudeRef, b"E" if lon >= 0 else b"W"),
+    )
+
+
+@lru_cache(maxsize=4096)
+def build_exif_bytes(date_str: str, latitude: str, longitude: str) -> bytes | None:
+    """
+    Serialize the capture date and GPS position; None if piexif is missing or
+    the values are bad. Bursts share a date and place, so the blob is cached
+    (and a bad value is only warned about once).
+    """
+    if piexif is None:
+        return None
+
+    try:
+        exif_dict = {"0th": {}, "Exif": {}, "GPS": {}}
+
+        exif_date = _exif_date(date_str) if date_str else None
+        if exif_date is not None:
+            exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = exif_date
+            exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized] = exif_date
+            exif_dict["0th"][piexif.ImageIFD.DateTime] = exif_date
+
+        if latitude != "Unknown" and longitude != "Unknown":
+            exif_dict["GPS"].update(_gps_entries(latitude, longitude))
+
+        return piexif.dump(exif_dict)
+
+    except Exception as e:
+        print(f"    Warning: Could not add EXIF metadata: {e}")
+        return None
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _tiff_payload(exif_bytes: bytes) -> bytes:
+    # piexif.dump() prefixes the APP1 marker text; PNG and WebP chunks hold bare TIFF.
+    return exif_bytes[6:] if exif_bytes.startswith(b"Exif\x00\x00") else exif_bytes
+
+
+def _splice_png_exif(image_data: bytes, exif_bytes: bytes) -> bytes | None:
+    """Insert (or replace) an eXIf chunk ahead of the image data; None if the PNG is malformed."""
+    payload = _tiff_payload(exif_bytes)
+    chunk = (
+        struct.pack(">I", len(payload))
+        + b"eXIf"
+        + payload
+        + struct.pack(">I", zlib.crc32(b"eXIf" + payload))
+    )
+    parts = [_PNG_SIGNATURE]
+    pos = len(_PNG_SIGNATURE)
+    inserted = False
+    while pos + 8 <= len(image_data):
+        length, ctype = struct.unpack_from(">I4s", image_data, pos)
+        end = pos + 12 + length
+        if end > len(image_data):
+            return None
+        if ctype == b"eXIf":
+            pos = end
+            continue
+        if not inserted and ctype in (b"IDAT", b"IEND"):
+            parts.append(chunk)
+            inserted = True
+        parts.append(image_data[pos:end])
+        pos = end
+        if ctype == b"IEND":
+            break
+    if not inserted:
+        return None
+    return b"".join(parts)
+
+
+def _webp_canvas(ctype: bytes, data: bytes) -> tuple[int, int, bool] | None:
+    """Canvas (width, height, has_alpha) of a simple-format WebP bitstream."""
+    if ctype == b"VP8 " and len(data) >= 10 and data[3:6] == b"\x9d\x01\x2a":
+        width, height = struct.unpack_from("<HH", data, 6)
+        width &= 0x3FFF
+        height &= 0x3FFF
+        # A zero dimension is a broken frame header, not a 1-pixel canvas.
+        return (width, height, False) if width and height else None
+    if ctype == b"VP8L" and len(data) >= 5 and data[0] == 0x2F:
+        bits = int.from_bytes(data[1:5], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, bool(bits >> 28 & 1)
+    return None
+
+
+def _splice_webp_exif(image_data: bytes, exif_bytes: bytes) -> bytes | None:
+    """Add (or replace) the EXIF chunk of a WebP file; None if the container is not understood."""
+    if len(image_data) < 12 or int.from_bytes(image_data[4:8], "little") + 8 > len(image_data):
+        return None
+    chunks: list[tuple[bytes, bytes]] = []
+    pos = 12
+    while pos + 8 <= len(image_data):
+        ctype = image_data[pos : pos + 4]
+        size = int.from_bytes(image_data[pos + 4 : pos + 8], "little")
+        data = image_data[pos + 8 : pos + 8 + size]
+        if len(data) != size:
+            return None
+        chunks.append((ctype, data))
+        pos += 8 + size + (size & 1)
+    if not chunks:
+        return None
+
+    if chunks[0][0] == b"VP8X":
+        header = bytearray(chunks[0][1])
+        if len(header) < 10:
+            return None
+        header[0] |= 0x08
+        chunks[0] = (b"VP8X", bytes(header))
+    else:
+        canvas = _webp_canvas(*chunks[0])
+        if canvas is None:
+            return None
+        width, height, has_alpha = canvas
+        flags = 0x08 | (0x10 if has_alpha else 0)
+        header = (
+            bytes([flags, 0, 0, 0])
+            + (width - 1).to_bytes(3, "little")
+            + (height - 1).to_bytes(3, "little")
+        )
+        chunks.insert(0, (b"VP8X", header))
+
+    chunks = [c for c in chunks if c[0] != b"EXIF"]
+    # EXIF follows the image data and precedes any XMP chunk.
+    at = next((i for i, c in enumerate(chunks) if c[0] == b"XMP "), len(chunks))
+    chunks.insert(at, (b"EXIF", _tiff_payload(exif_bytes)))
+
+    body = b"".join(
+        ctype + len(data).to_bytes(4, "little") + data + (b"\x00" if len(data) & 1 else b"")
+        for ctype, data in chunks
+    )
+    return b"RIFF" + (len(body) + 4).to_bytes(4, "little") + b"WEBP" + body
 
 
 def add_exif_metadata(
@@ -21,45 +181,54 @@ def add_exif_metadata(
     latitude: str,
     longitude: str,
 ) -> bytes:
-    if piexif is None or Image is None:
+    # Sniff the magic bytes instead of opening the image with PIL: other
+    # formats are returned untouched, and these three are edited in place.
+    kind = detect_file_kind(image_data)
+    if piexif is None or kind not in ("jpeg", "png", "webp"):
+        return image_data
+
+    exif_bytes = build_exif_bytes(date_str, latitude, longitude)
+    if exif_bytes is None:
         return image_data
 
     try:
-        lat = float(latitude) if latitude != "Unknown" else None
-        lon = float(longitude) if longitude != "Unknown" else None
+        if kind == "jpeg":
+            # Splice the APP1 segment in place: no decode/re-encode, so the
+            # original JPEG scan data is kept bit-for-bit.
+            output = io.BytesIO()
+            piexif.insert(exif_bytes, image_data, output)
+            return output.getvalue()
+        if kind == "png":
+            spliced = _splice_png_exif(image_data, exif_bytes)
+        else:
+            # Chunk-level edit: re-saving through PIL would re-encode lossy WebP.
+            spliced = _splice_webp_exif(image_data, exif_bytes)
+        if spliced is not None:
+            return spliced
+    except Exception:
+        pass
+
+    # Only a file whose container could not be edited gets here.
+    if Image is None:
+        return image_data
 
+    try:
         img = Image.open(io.BytesIO(image_data))
         original_format = img.format
 
-        exif_dict = {"0th": {}, "Exif": {}, "GPS": {}}
-
-        if date_str and date_str != "Unknown":
-            date_clean = date_str.replace(" UTC", "")
-            try:
-                dt = datetime.strptime(date_clean, "%Y-%m-%d %H:%M:%S")
-                exif_date = dt.strftime("%Y:%m:%d %H:%M:%S")
-                exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = exif_date.encode()
-                exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized] = exif_date.encode()
-                exif_dict["0th"][piexif.ImageIFD.DateTime] = exif_date.encode()
-            except ValueError:
-                pass
-
-        if lat is not None and lon is not None:
-            lat_dms = decimal_to_dms(lat)
-            exif_dict["GPS"][piexif.GPSIFD.GPSLatitude] = lat_dms
-            exif_dict["GPS"][piexif.GPSIFD.GPSLatitudeRef] = b"N" if lat >= 0 else b"S"
-
-            lon_dms = decimal_to_dms(lon)
-            exif_dict["GPS"][piexif.GPSIFD.GPSLongitude] = lon_dms
-            exif_dict["GPS"][piexif.GPSIFD.GPSLongitudeRef] = b"E" if lon >= 0 else b"W"
-
-        exif_bytes = piexif.dump(exif_dict)
         output = io.BytesIO()
 
         if original_format in ["JPEG", "JPG"]:
             if img.mode == "RGBA":
                 img = img.convert("RGB")
-            img.save(output, format="JPEG", quality=95, exif=exif_bytes)
+            img.save(
+                output,
+                format="JPEG",
+                quality=95,
+                optimize=False,
+                progressive=False,
+                exif=exif_bytes,
+            )
         elif original_format == "PNG":
             try:
                 img.save(output, format="PNG", exif=exif_bytes)
@@ -75,4 +244,3 @@ def add_exif_metadata(
     except Exception as e:
         print(f"    Warning: Could not add EXIF metadata: {e}")
         return image_data
-
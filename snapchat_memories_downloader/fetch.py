@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from .http_session import download_slots
+from .magic_bytes import detect_file_kind, is_zip_file
+
+
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Enough of the body to tell a ZIP from an MP4/MOV (ftyp brand ends at byte 12).
+_SNIFF_SIZE = 16
+
+
+def _read_head(chunks: Iterator[bytes], size: int) -> bytes:
+    """Join leading chunks until at least `size` bytes are in hand or the body ends."""
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head
+
+
+def fetch_content(
+    http,
+    url: str,
+    headers: dict,
+    hasher=None,
+    spool_to: Path | None = None,
+    zip_only: bool = False,
+) -> tuple[bytes | None, int, bytes]:
+    """
+    Download `url`, returning (body, size, head of the body).
+
+    With `spool_to`, a ZIP or plain video is streamed straight into that
+    file instead of being held in memory, and the body is returned as None.
+    With `zip_only`, a response that does not start like a ZIP is abandoned
+    after its first four bytes, which are all that is returned.
+    """
+    # requests' .content reads in 10 KiB chunks; multi-MB videos want larger reads.
+    with download_slots, http.get(
+        url, headers=headers, timeout=30, stream=True
+    ) as response:
+        response.raise_for_status()
+        if zip_only:
+            # Four bytes decide it; don't pull a whole chunk of a body that is
+            # about to be discarded.
+            head = _read_head(response.iter_content(chunk_size=4), 4)
+            if not is_zip_file(head):
+                return head, len(head), head
+        chunks = response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE)
+        if not zip_only:
+            head = _read_head(chunks, _SNIFF_SIZE)
+        if hasher is not None:
+            hasher.update(head)
+
+        if spool_to is not None and (
+            is_zip_file(head) or detect_file_kind(head) in ("mp4", "mov")
+        ):
+            return None, _spool(head, chunks, spool_to, hasher), head
+        content = _read_body(head, chunks, hasher)
+    return content, len(content), head
+
+
+def _spool(head: bytes, chunks: Iterator[bytes], spool_to: Path, hasher) -> int:
+    """Write the body to `spool_to`, removing it if the download fails; returns its size."""
+    size = len(head)
+    try:
+        with open(spool_to, "wb") as f:
+            f.write(head)
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+    except BaseException:
+        spool_to.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def _read_body(head: bytes, chunks: Iterator[bytes], hasher) -> bytes:
+    body = [head]
+    for chunk in chunks:
+        body.append(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+    return b"".join(body)
+
+
+@contextmanager
+def open_zip(content: bytes | None, part_path: Path | None) -> Iterator[zipfile.ZipFile]:
+    """Open an in-memory or spooled ZIP download, removing the spool file afterwards."""
+    if content is not None:
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            yield zf
+        return
+    try:
+        with zipfile.ZipFile(part_path) as zf:
+            yield zf
+    finally:
+        part_path.unlink(missing_ok=True)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import os
+import shutil
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO
 
 
 _WINDOWS_RESERVED_DEVICE_NAMES = {
@@ -22,17 +25,39 @@ _WINDOWS_FILENAME_TRANSLATION = {
     **{i: "_" for i in range(32)},  # control chars 0-31
 }
 
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tiff", ".tif"})
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".avi"})
+_EXTENSION_BY_MEDIA_TYPE = {"Video": ".mp4"}
+# Buffer for stream-to-file copies; shutil's 64 KiB default means ~16x the
+# read/write calls on multi-MB media.
+COPY_BUFFER_SIZE = 1 << 20
+
 
 def get_file_extension(media_type: str) -> str:
-    if media_type == "Video":
-        return ".mp4"
-    return ".jpg"
+    return _EXTENSION_BY_MEDIA_TYPE.get(media_type, ".jpg")
 
 
+@lru_cache(maxsize=4096)
 def parse_date_to_timestamp(date_str: str) -> float | None:
     try:
         date_str_clean = date_str.replace(" UTC", "")
-        dt = datetime.strptime(date_str_clean, "%Y-%m-%d %H:%M:%S")
+        if (
+            len(date_str_clean) == 19
+            and date_str_clean[4] == date_str_clean[7] == "-"
+            and date_str_clean[10] == " "
+            and date_str_clean[13] == date_str_clean[16] == ":"
+        ):
+            # The export's fixed layout; slicing avoids strptime's format parsing.
+            dt = datetime(
+                int(date_str_clean[0:4]),
+                int(date_str_clean[5:7]),
+                int(date_str_clean[8:10]),
+                int(date_str_clean[11:13]),
+                int(date_str_clean[14:16]),
+                int(date_str_clean[17:19]),
+            )
+        else:
+            dt = datetime.strptime(date_str_clean, "%Y-%m-%d %H:%M:%S")
         return dt.timestamp()
     except (ValueError, AttributeError) as e:
         print(f"    Warning: Could not parse date '{date_str}': {e}")
@@ -44,6 +69,54 @@ def set_file_timestamp(file_path: Path, timestamp: float | None) -> None:
         os.utime(file_path, (timestamp, timestamp))
 
 
+def set_file_timestamps(directory: Path, names: list[str], timestamp: float | None) -> None:
+    """Set the timestamp of several files in `directory`, resolving the directory once."""
+    if not timestamp:
+        return
+    if len(names) < 2 or os.utime not in os.supports_dir_fd:
+        for name in names:
+            set_file_timestamp(directory / name, timestamp)
+        return
+
+    dir_fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        for name in names:
+            os.utime(name, (timestamp, timestamp), dir_fd=dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def write_file_atomic(path: Path, data: bytes | BinaryIO, drop_cache: bool = True) -> None:
+    """
+    Write `data` (bytes or a readable stream) through a sibling `.part` file
+    and rename, so a crash never leaves a truncated output behind. Pass
+    `drop_cache=False` for a file that is about to be read back.
+    """
+    part_path = path.with_name(path.name + ".part")
+    try:
+        with open(part_path, "wb") as f:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                shutil.copyfileobj(data, f, COPY_BUFFER_SIZE)
+            if drop_cache:
+                f.flush()
+                drop_cached_pages(f.fileno())
+        os.replace(part_path, path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
+
+def drop_cached_pages(fd: int) -> None:
+    """Hint that a freshly written file is done with, so it doesn't evict useful page cache."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
 def make_filesystem_safe_stem(stem: str) -> str:
     safe = stem.translate(_WINDOWS_FILENAME_TRANSLATION)
     safe = safe.strip().rstrip(" .")
@@ -58,6 +131,17 @@ def make_filesystem_safe_stem(stem: str) -> str:
     return safe
 
 
+@lru_cache(maxsize=4096)
+def _timestamp_stem(date_str: str) -> str | None:
+    # Memories taken in the same second share a stem, and every saved file of
+    # a memory asks for it again, so the string work is done once per date.
+    parts = date_str.replace(" UTC", "").strip().split(" ")
+    if len(parts) != 2:
+        return None
+    date_part, time_part = parts
+    return make_filesystem_safe_stem(f"{date_part.replace('-', '.')}-{time_part}")
+
+
 def generate_filename(
     date_str: str,
     extension: str,
@@ -66,20 +150,16 @@ def generate_filename(
 ) -> str:
     if use_timestamp:
         try:
-            date_str_clean = date_str.replace(" UTC", "").strip()
-            parts = date_str_clean.split(" ")
-            if len(parts) == 2:
-                date_part = parts[0].replace("-", ".")
-                time_part = parts[1]
-                stem = make_filesystem_safe_stem(f"{date_part}-{time_part}")
-                return f"{stem}{extension}"
-            print(f"    Warning: Unexpected date format '{date_str}', using sequential number")
-            return f"{fallback_num}{extension}"
+            stem = _timestamp_stem(date_str)
         except Exception as e:
             print(
                 f"    Warning: Could not parse date for filename '{date_str}': {e}, using sequential number"
             )
             return f"{fallback_num}{extension}"
+        if stem is None:
+            print(f"    Warning: Unexpected date format '{date_str}', using sequential number")
+            return f"{fallback_num}{extension}"
+        return f"{stem}{extension}"
 
     stem = make_filesystem_safe_stem(str(fallback_num))
     return f"{stem}{extension}"
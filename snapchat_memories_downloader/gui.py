@@ -18,11 +18,14 @@ from snapchat_memories_downloader.process_lifecycle import enable_kill_children_
 from snapchat_memories_downloader.shell_open import open_path
 from snapchat_memories_downloader.system_load import CpuUsageSampler, auto_job_target, throttle_sleep
 
+_TEST_MODE_LIMIT = 3
+
 
 class SnapchatGui:
     def __init__(self, page: ft.Page):
         enable_kill_children_on_exit()
         self.page = page
+        self._ui_dispatch = None
         self.stop_event = threading.Event()
         self.pump: UiEventPump | None = None
         self._last_report_file: Path | None = None
@@ -335,12 +338,17 @@ class SnapchatGui:
             pass
 
     def _run_in_ui(self, fn) -> None:
+        # Resolved once: this runs for every log flush and progress update.
+        if self._ui_dispatch is None:
+            self._ui_dispatch = self._resolve_ui_dispatch()
+        self._ui_dispatch(fn)
+
+    def _resolve_ui_dispatch(self):
         for method_name in ("call_from_thread", "invoke_later"):
             method = getattr(self.page, method_name, None)
             if callable(method):
-                method(fn)
-                return
-        fn()
+                return method
+        return lambda fn: fn()
 
     def _validate_inputs(self) -> tuple[bool, str]:
         html_raw = (self.html_input.value or "").strip()
@@ -385,12 +393,17 @@ class SnapchatGui:
 
         is_test = self.mode_dropdown.value == "test"
         if is_test:
-            self._append_log_line("Test mode: downloading first 3 items")
+            self._append_log_line(f"Test mode: downloading first {_TEST_MODE_LIMIT} items")
         self._append_log_line("Overlay merges will run after downloads complete.")
 
         jobs = 1
         jobs_supplier = None
-        if bool(self.concurrent_cb.value) and not is_test:
+        concurrent = bool(self.concurrent_cb.value)
+        if is_test:
+            # The test batch is tiny and network-bound: fetch every item at once.
+            concurrent = True
+            jobs = _TEST_MODE_LIMIT
+        elif concurrent:
             jobs = self._auto_jobs_supplier()
             jobs_supplier = self._auto_jobs_supplier
 
@@ -412,10 +425,10 @@ class SnapchatGui:
             "use_timestamp_filenames": bool(self.timestamp_cb.value),
             "remove_duplicates": bool(self.duplicates_cb.value),
             "join_multi_snaps_enabled": bool(self.join_multi_cb.value),
-            "concurrent": bool(self.concurrent_cb.value) and not is_test,
+            "concurrent": concurrent,
             "jobs": jobs,
             "jobs_supplier": jobs_supplier,
-            "limit": 3 if is_test else None,
+            "limit": _TEST_MODE_LIMIT if is_test else None,
             "stop_event": self.stop_event,
             "progress_callback": self.pump.progress_callback if self.pump else None,
             "show_report": True,
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+
+from .metadata_store import read_json
+
+try:
+    import xxhash  # type: ignore
+except ImportError:  # pragma: no cover - xxhash is optional
+    xxhash = None
+
+try:
+    import blake3  # type: ignore
+except ImportError:  # pragma: no cover - blake3 is optional
+    blake3 = None
+
+# Name of the digest produced by compute_*_hash, for anything that persists
+# hashes and must not compare digests from different algorithms.
+if xxhash is not None:
+    HASH_ALGO = "xxh3_128"
+elif blake3 is not None:
+    HASH_ALGO = "blake3"
+else:
+    HASH_ALGO = "md5"
+
+
+# Multi-MB videos are hashed in large reads to keep per-call overhead low.
+HASH_READ_SIZE = 1 << 20
+# Files at least this big are memory-mapped and hashed in MMAP_HASH_CHUNK steps.
+MMAP_HASH_MIN_SIZE = 4 << 20
+MMAP_HASH_CHUNK = 4 << 20
+# Bytes hashed from the head, middle and tail of a file for the quick
+# same-size comparison.
+QUICK_HASH_WINDOW = 64 * 1024
+
+# Sidecar remembering full hashes between duplicate scans, keyed by file name
+# and validated against size and mtime.
+HASH_CACHE_NAME = ".hash_cache.json"
+
+
+def compute_file_hash(file_path: Path) -> str:
+    if HASH_ALGO == "blake3":
+        # Memory-mapped and multi-threaded inside the extension.
+        file_hash = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        file_hash.update_mmap(str(file_path))
+        return file_hash.hexdigest()
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_HASH_MIN_SIZE:
+            return _hash_mapped_file(f.fileno(), size)
+        # Read into one reused buffer, so no bytes object is allocated per
+        # chunk (hashlib.file_digest would do this too, but with 256 KiB reads).
+        file_hash = new_data_hasher()
+        buf = bytearray(HASH_READ_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            file_hash.update(view[:n])
+    return file_hash.hexdigest()
+
+
+def _hash_mapped_file(fd: int, size: int) -> str:
+    # Hash straight out of the page cache instead of copying every chunk into
+    # a Python bytes object first.
+    file_hash = new_data_hasher()
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for offset in range(0, size, MMAP_HASH_CHUNK):
+                file_hash.update(view[offset : offset + MMAP_HASH_CHUNK])
+    return file_hash.hexdigest()
+
+
+def compute_data_hash(data: bytes) -> str:
+    if HASH_ALGO == "xxh3_128":
+        return xxhash.xxh3_128_hexdigest(data)
+    if HASH_ALGO == "blake3":
+        return blake3.blake3(data).hexdigest()
+    return hashlib.md5(data).hexdigest()
+
+
+def _quick_hash_offsets(size: int) -> tuple[int, int, int]:
+    # Head, middle and tail windows; they may overlap for files just over
+    # the 2-window threshold, which is harmless as long as both sides agree.
+    return 0, (size - QUICK_HASH_WINDOW) // 2, size - QUICK_HASH_WINDOW
+
+
+def compute_quick_data_hash(data: bytes) -> str:
+    view = memoryview(data)
+    quick_hash = new_data_hasher()
+    for offset in _quick_hash_offsets(len(data)):
+        quick_hash.update(view[offset : offset + QUICK_HASH_WINDOW])
+    return quick_hash.hexdigest()
+
+
+def compute_quick_file_hash(file_path: Path) -> str:
+    """Same as `compute_quick_data_hash`, reading only the sampled windows of the file."""
+    quick_hash = new_data_hasher()
+    with open(file_path, "rb") as f:
+        fd = f.fileno()
+        offsets = _quick_hash_offsets(os.fstat(fd).st_size)
+        if hasattr(os, "pread"):
+            # Positional reads: no seeks, and nothing buffered beyond the windows.
+            for offset in offsets:
+                quick_hash.update(os.pread(fd, QUICK_HASH_WINDOW, offset))
+        else:
+            for offset in offsets:
+                f.seek(offset)
+                quick_hash.update(f.read(QUICK_HASH_WINDOW))
+    return quick_hash.hexdigest()
+
+
+def new_data_hasher():
+    """Return an incremental hasher whose hexdigest matches `compute_data_hash`."""
+    # Duplicate detection only needs to tell files apart, not resist attacks;
+    # xxh3 and BLAKE3 are both far faster than MD5.
+    if HASH_ALGO == "xxh3_128":
+        return xxhash.xxh3_128()
+    if HASH_ALGO == "blake3":
+        return blake3.blake3()
+    return hashlib.md5()
+
+
+def stored_hash(data_hash: str) -> str:
+    """Tag a digest with its algorithm before persisting it (e.g. in metadata.json)."""
+    return f"{HASH_ALGO}:{data_hash}"
+
+
+def load_known_hashes(folder_path: Path) -> dict[str, tuple[str, int]]:
+    """Map file name -> (hash, size) for files whose hash metadata.json recorded."""
+    try:
+        metadata_list = read_json(folder_path / "metadata.json")
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(metadata_list, list):
+        return {}
+
+    prefix = f"{HASH_ALGO}:"
+    known: dict[str, tuple[str, int]] = {}
+    for item in metadata_list:
+        if not isinstance(item, dict):
+            continue
+        for file_entry in item.get("files") or []:
+            if not isinstance(file_entry, dict) or file_entry.get("type") == "duplicate":
+                continue
+            tagged = file_entry.get("hash")
+            if isinstance(tagged, str) and tagged.startswith(prefix):
+                known[file_entry.get("path")] = (tagged[len(prefix) :], file_entry.get("size"))
+    return known
+
+
+def load_hash_cache(folder_path: Path) -> dict[str, list]:
+    """Map file name -> [size, mtime_ns, hash] from the sidecar; empty if missing or stale."""
+    try:
+        with open(folder_path / HASH_CACHE_NAME, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("algo") != HASH_ALGO:
+        return {}
+    files = cache.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_hash_cache(folder_path: Path, files: dict[str, list]) -> None:
+    """Write the name -> [size, mtime_ns, hash] map to the sidecar, replacing it atomically."""
+    cache_file = folder_path / HASH_CACHE_NAME
+    if not files and not cache_file.exists():
+        return
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"algo": HASH_ALGO, "files": files}, f, separators=(",", ":"))
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"  Warning: Could not save {HASH_CACHE_NAME}: {e}")
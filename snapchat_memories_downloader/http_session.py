@@ -0,0 +1,48 @@
+"""
+Pooled HTTP session for memory downloads.
+
+Every memory is fetched from the same Snapchat CDN hosts, so one keep-alive
+session per run lets workers reuse TCP+TLS connections instead of paying a
+fresh handshake per item.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from urllib3.util.retry import Retry
+
+from .deps import requests
+
+
+# Cap on bodies streaming from the CDN at once. Workers beyond this keep
+# overlapping EXIF/overlay work with downloads instead of opening more
+# connections to the same host and inviting rate limiting.
+MAX_CONCURRENT_DOWNLOADS = 8
+
+download_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
+DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+}
+
+# Transient CDN/gateway failures are retried inside the pooled connection
+# rather than surfacing as a failed memory that needs a --retry-failed run.
+_RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def create_download_session(pool_size: int = 1) -> requests.Session:
+    """Build a session whose connection pool fits `pool_size` concurrent workers."""
+    pool_size = max(1, min(int(pool_size), MAX_CONCURRENT_DOWNLOADS))
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size * 2,
+        max_retries=Retry(
+            total=3, backoff_factor=0.3, status_forcelist=_RETRY_STATUSES
+        ),
+    )
+    session = requests.Session()
+    session.headers.update(DOWNLOAD_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Iterable
+
+MAX_JOBS = 20
+
+
+def read_job_limit(jobs_supplier: Callable[[], int] | None, default: int) -> int:
+    """Current worker limit, clamped to 1..MAX_JOBS."""
+    value = default
+    if jobs_supplier:
+        try:
+            value = int(jobs_supplier())
+        except (TypeError, ValueError):
+            value = default
+    return max(1, min(value, MAX_JOBS))
+
+
+def run_job_pool(
+    items: Iterable,
+    handle: Callable,
+    max_workers: int,
+    default_jobs: int,
+    jobs_supplier: Callable[[], int] | None = None,
+    stop_event: threading.Event | None = None,
+) -> None:
+    """
+    Call `handle(item)` for each item on up to `max_workers` threads.
+
+    Workers above the current limit (`jobs_supplier`, polled while the pool
+    runs) sit idle until it is raised. Items are no longer queued once
+    `stop_event` is set.
+    """
+    allowed_workers = {"value": read_job_limit(jobs_supplier, default_jobs)}
+    allowed_cv = threading.Condition(threading.Lock())
+    monitor_stop = threading.Event()
+    if jobs_supplier:
+        threading.Thread(
+            target=_monitor_jobs,
+            args=(allowed_workers, allowed_cv, monitor_stop, jobs_supplier, default_jobs),
+            daemon=True,
+        ).start()
+
+    work_queue: queue.Queue = queue.Queue()
+    threads = []
+    for worker_id in range(1, max_workers + 1):
+        t = threading.Thread(
+            target=_worker,
+            args=(worker_id, work_queue, handle, allowed_workers, allowed_cv, stop_event),
+            daemon=True,
+        )
+        t.start()
+        threads.append(t)
+
+    for item in items:
+        if stop_event and stop_event.is_set():
+            break
+        work_queue.put(item)
+
+    for _ in threads:
+        work_queue.put(None)
+
+    work_queue.join()
+    monitor_stop.set()
+    with allowed_cv:
+        allowed_cv.notify_all()
+    for t in threads:
+        t.join(timeout=0.5)
+
+
+def _monitor_jobs(
+    allowed_workers: dict,
+    allowed_cv: threading.Condition,
+    monitor_stop: threading.Event,
+    jobs_supplier: Callable[[], int],
+    default_jobs: int,
+) -> None:
+    last_value = None
+    while not monitor_stop.is_set():
+        current = read_job_limit(jobs_supplier, default_jobs)
+        if current != last_value:
+            with allowed_cv:
+                allowed_workers["value"] = current
+                allowed_cv.notify_all()
+            last_value = current
+        monitor_stop.wait(0.3)
+
+
+def _worker(
+    worker_id: int,
+    work_queue: queue.Queue,
+    handle: Callable,
+    allowed_workers: dict,
+    allowed_cv: threading.Condition,
+    stop_event: threading.Event | None,
+) -> None:
+    while True:
+        with allowed_cv:
+            while worker_id > allowed_workers["value"]:
+                if stop_event and stop_event.is_set():
+                    break
+                allowed_cv.wait(timeout=0.5)
+        # Every worker gets a None sentinel, so a blocking get cannot hang;
+        # polling only woke idle workers five times a second.
+        item = work_queue.get()
+        if item is None:
+            work_queue.task_done()
+            break
+        try:
+            handle(item)
+        finally:
+            work_queue.task_done()
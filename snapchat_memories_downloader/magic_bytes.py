@@ -15,34 +15,35 @@ FileKind = Literal[
     "unknown",
 ]
 
+_HEIC_BRANDS = frozenset({b"heic", b"heix", b"heim", b"hevc", b"hevx", b"mif1", b"msf1"})
+# Box types that can open an MP4/QuickTime file.
+_MP4_LEADING_BOXES = frozenset({b"ftyp", b"mdat", b"moov", b"wide"})
+
+
+def is_zip_file(data: bytes) -> bool:
+    # Local file header signature; stricter than the bare "PK" prefix.
+    return data.startswith(b"PK\x03\x04")
+
 
 def detect_file_kind(data: bytes) -> FileKind:
-    if len(data) >= 2 and data[:2] == b"PK":
+    if is_zip_file(data):
         return "zip"
 
-    if len(data) >= 3 and data[:3] == b"\xFF\xD8\xFF":
+    if data.startswith(b"\xFF\xD8\xFF"):
         return "jpeg"
 
-    if len(data) >= 8 and data[:8] == b"\x89PNG\r\n\x1a\n":
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
         return "png"
 
-    if len(data) >= 6 and (data[:6] == b"GIF87a" or data[:6] == b"GIF89a"):
+    if data.startswith((b"GIF87a", b"GIF89a")):
         return "gif"
 
-    if len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+    if data.startswith(b"RIFF") and data.startswith(b"WEBP", 8):
         return "webp"
 
-    if len(data) >= 12 and data[4:8] == b"ftyp":
+    if len(data) >= 12 and data.startswith(b"ftyp", 4):
         brand = data[8:12]
-        if brand in {
-            b"heic",
-            b"heix",
-            b"heim",
-            b"hevc",
-            b"hevx",
-            b"mif1",
-            b"msf1",
-        }:
+        if brand in _HEIC_BRANDS:
             return "heic"
         if brand == b"qt  ":
             return "mov"
@@ -51,6 +52,31 @@ def detect_file_kind(data: bytes) -> FileKind:
     return "unknown"
 
 
+def has_mp4_signature(data: bytes) -> bool:
+    return data[4:8] in _MP4_LEADING_BOXES
+
+
+def mp4_moov_before_mdat(data: bytes) -> bool:
+    """True when the top-level `moov` box precedes `mdat`, so the file is readable from a pipe."""
+    pos = 0
+    end = len(data)
+    while pos + 8 <= end:
+        size = int.from_bytes(data[pos : pos + 4], "big")
+        box_type = data[pos + 4 : pos + 8]
+        if box_type == b"moov":
+            return True
+        if box_type == b"mdat":
+            return False
+        if size == 1:
+            if pos + 16 > end:
+                return False
+            size = int.from_bytes(data[pos + 8 : pos + 16], "big")
+        if size < 8:
+            return False
+        pos += size
+    return False
+
+
 def extension_for_kind(kind: FileKind, fallback: str) -> str:
     if kind == "zip":
         return ".zip"
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 metadata_lock = threading.Lock()
 
 _PROGRESS_FIELDS = {"status", "files", "error", "skip_reason"}
@@ -38,20 +45,127 @@ def initialize_metadata(memories: list, output_path: Path) -> list:
     return metadata_list
 
 
-def save_metadata(metadata_list: list, output_path: Path) -> None:
+def save_metadata(metadata_list: list, output_path: Path, *, durable: bool = True) -> None:
+    """
+    Atomically replace metadata.json.
+
+    Per-item progress saves pass `durable=False` to skip the fsync: the rename
+    still keeps the file intact, and losing the last few status updates to a
+    power cut only means re-downloading those items. Those saves are also
+    written compactly; only durable saves are indented for reading.
+    """
     metadata_file = output_path / "metadata.json"
     tmp_file = output_path / "metadata.json.tmp"
-    with open(tmp_file, "w", encoding="utf-8") as f:
-        json.dump(metadata_list, f, indent=2, ensure_ascii=False)
-        f.flush()
-        os.fsync(f.fileno())
+    payload = _encode_metadata(metadata_list, indent=durable)
+    with open(tmp_file, "wb") as f:
+        f.write(payload)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
     tmp_file.replace(metadata_file)
 
 
+class MetadataWriter:
+    """
+    Coalesce per-item progress saves.
+
+    Rewriting metadata.json costs O(number of memories), so doing it twice per
+    download dominates on large exports. Changes are counted instead and the
+    file is rewritten every `every` changes or `interval` seconds, whichever
+    comes first; a timer covers the case where no further change arrives.
+    All methods must be called with `metadata_lock` held.
+    """
+
+    def __init__(
+        self,
+        metadata_list: list,
+        output_path: Path,
+        *,
+        every: int = 25,
+        interval: float = 5.0,
+    ) -> None:
+        self.metadata_list = metadata_list
+        self.output_path = output_path
+        self.every = every
+        self.interval = interval
+        self._pending = 0
+        self._last_save = time.monotonic()
+        self._timer: threading.Timer | None = None
+        self._exit_hook = False
+
+    def mark_dirty(self) -> None:
+        self._pending += 1
+        if self._pending >= self.every or time.monotonic() - self._last_save >= self.interval:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+            if not self._exit_hook:
+                # The timer thread is a daemon; don't lose its batch if the
+                # process exits before it fires.
+                atexit.register(self._flush_at_exit)
+                self._exit_hook = True
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        save_metadata(self.metadata_list, self.output_path, durable=False)
+        self._pending = 0
+        self._last_save = time.monotonic()
+
+    def close(self) -> None:
+        """Cancel any pending timer and write the final state durably."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        save_metadata(self.metadata_list, self.output_path)
+        self._pending = 0
+        self._last_save = time.monotonic()
+        if self._exit_hook:
+            atexit.unregister(self._flush_at_exit)
+            self._exit_hook = False
+
+    def _flush_from_timer(self) -> None:
+        with metadata_lock:
+            self._timer = None
+            self.flush()
+
+    def _flush_at_exit(self) -> None:
+        # A daemon worker killed mid-update may still hold the lock.
+        if metadata_lock.acquire(timeout=5):
+            try:
+                self.flush()
+            finally:
+                metadata_lock.release()
+
+
+def _encode_metadata(metadata_list: list, *, indent: bool = True) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(metadata_list, option=orjson.OPT_INDENT_2 if indent else None)
+        except TypeError:
+            pass
+    if not indent:
+        return json.dumps(metadata_list, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return json.dumps(metadata_list, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def read_json(path: Path) -> Any:
+    """Parse a JSON file, with orjson when installed (it also decodes the UTF-8 itself)."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def _load_json(path: Path) -> Any:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return read_json(path)
     except json.JSONDecodeError as exc:
         print(f"Warning: Failed to parse {path.name}: {exc}")
         return None
@@ -68,20 +182,19 @@ def _backup_corrupt_file(metadata_file: Path) -> None:
 
 
 def _build_fresh_metadata(memories: list[dict]) -> list[dict]:
-    metadata_list: list[dict] = []
-    for idx, memory in enumerate(memories, start=1):
-        metadata_list.append(
-            {
-                "number": idx,
-                "date": memory.get("date", "Unknown"),
-                "media_type": memory.get("media_type", "Unknown"),
-                "latitude": memory.get("latitude", "Unknown"),
-                "longitude": memory.get("longitude", "Unknown"),
-                "url": memory.get("url", ""),
-                "status": "pending",
-                "files": [],
-            }
-        )
+    metadata_list: list[dict] = [{}] * len(memories)
+    for idx, memory in enumerate(memories):
+        get = memory.get
+        metadata_list[idx] = {
+            "number": idx + 1,
+            "date": get("date", "Unknown"),
+            "media_type": get("media_type", "Unknown"),
+            "latitude": get("latitude", "Unknown"),
+            "longitude": get("longitude", "Unknown"),
+            "url": get("url", ""),
+            "status": "pending",
+            "files": [],
+        }
     return metadata_list
 
 
@@ -4,16 +4,10 @@ import os
 from pathlib import Path
 
 from . import deps
+from .files import VIDEO_EXTENSIONS
 from .subprocess_utils import run_capture
 
 
-_VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi"}
-
-
-def _is_video_file(path: Path) -> bool:
-    return path.is_file() and path.suffix.lower() in _VIDEO_EXTENSIONS
-
-
 def _is_overlay_video(path: Path) -> bool:
     return path.stem.lower().endswith("-overlay")
 
@@ -50,6 +44,18 @@ def _safe_unlink(path: Path) -> bool:
         return False
 
 
+def _group_by_time_gaps(video_info: list[dict], time_threshold_seconds: float) -> list[list[dict]]:
+    """Split mtime-sorted videos wherever neighbours are further apart than the threshold."""
+    mtimes = [video["mtime"] for video in video_info]
+    breaks = [
+        i
+        for i, (previous, current) in enumerate(zip(mtimes, mtimes[1:]), start=1)
+        if current - previous > time_threshold_seconds
+    ]
+    bounds = zip([0, *breaks], [*breaks, len(video_info)])
+    return [video_info[start:end] for start, end in bounds if end - start > 1]
+
+
 def join_multi_snaps(folder_path: Path, time_threshold_seconds: int = 10) -> dict:
     if not deps.ffmpeg_available:
         print("\nWarning: FFmpeg not available, cannot join multi-snaps")
@@ -59,31 +65,29 @@ def join_multi_snaps(folder_path: Path, time_threshold_seconds: int = 10) -> dic
     print("Detecting multi-snap videos...")
     print("=" * 60)
 
-    all_videos = [
-        path
-        for path in folder_path.iterdir()
-        if _is_video_file(path) and not _is_overlay_video(path) and not _is_joined_video(path)
-    ]
-
-    if len(all_videos) < 2:
+    # One scandir pass gives each candidate's type and timestamps together;
+    # the stat result is kept so the joined file can inherit it later.
+    video_info: list[dict] = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            path = Path(entry.path)
+            if (
+                path.suffix.lower() not in VIDEO_EXTENSIONS
+                or _is_overlay_video(path)
+                or _is_joined_video(path)
+                or not entry.is_file()
+            ):
+                continue
+            stat = entry.stat()
+            video_info.append({"path": path, "mtime": stat.st_mtime, "atime": stat.st_atime})
+
+    if len(video_info) < 2:
         print("Not enough videos to check for multi-snaps")
         return {"groups_found": 0, "videos_joined": 0, "files_deleted": 0, "overlays_deleted": 0}
 
-    video_info = [{"path": video_path, "mtime": video_path.stat().st_mtime} for video_path in all_videos]
     video_info.sort(key=lambda x: x["mtime"])
 
-    groups: list[list[dict]] = []
-    current_group = [video_info[0]]
-    for i in range(1, len(video_info)):
-        time_diff = abs(video_info[i]["mtime"] - current_group[-1]["mtime"])
-        if time_diff <= time_threshold_seconds:
-            current_group.append(video_info[i])
-        else:
-            if len(current_group) > 1:
-                groups.append(current_group)
-            current_group = [video_info[i]]
-    if len(current_group) > 1:
-        groups.append(current_group)
+    groups = _group_by_time_gaps(video_info, time_threshold_seconds)
 
     if not groups:
         print("No multi-snap video groups found")
@@ -127,10 +131,14 @@ def join_multi_snaps(folder_path: Path, time_threshold_seconds: int = 10) -> dic
 
             result = run_capture(cmd, timeout=300)
 
-            if result.returncode == 0 and output_path.exists() and output_path.stat().st_size > 1000:
-                print(f"    Joined: {output_name} ({output_path.stat().st_size:,} bytes)")
-                first_stat = first_video.stat()
-                os.utime(output_path, (first_stat.st_atime, first_stat.st_mtime))
+            try:
+                output_size = output_path.stat().st_size if result.returncode == 0 else 0
+            except FileNotFoundError:
+                output_size = 0
+
+            if output_size > 1000:
+                print(f"    Joined: {output_name} ({output_size:,} bytes)")
+                os.utime(output_path, (group[0]["atime"], group[0]["mtime"]))
 
                 for video in group:
                     if _safe_unlink(video["path"]):
@@ -149,8 +157,7 @@ def join_multi_snaps(folder_path: Path, time_threshold_seconds: int = 10) -> dic
         except Exception as e:
             print(f"    ERROR: {str(e)}")
         finally:
-            if concat_list_path.exists():
-                concat_list_path.unlink()
+            concat_list_path.unlink(missing_ok=True)
 
     print("\n" + "=" * 60)
     print("Multi-snap joining complete!")
@@ -1,26 +1,21 @@
 from __future__ import annotations
 
-import queue
 import threading
 import time
 import zipfile
 from collections.abc import Callable
 from pathlib import Path
 
+from .deferred_merge import merge_deferred_overlays
 from .deps import requests
 from .downloader import download_and_extract
 from .duplicates import DuplicateIndex
-from .exif_utils import add_exif_metadata
-from .files import (
-    generate_filename,
-    get_file_extension,
-    parse_date_to_timestamp,
-    set_file_timestamp,
-)
-from .metadata_store import initialize_metadata, metadata_lock, save_metadata
+from .files import get_file_extension, parse_date_to_timestamp, set_file_timestamps
+from .http_session import create_download_session
+from .job_pool import MAX_JOBS, run_job_pool
+from .metadata_store import MetadataWriter, initialize_metadata, metadata_lock
 from .multisnap import join_multi_snaps
-from .overlay import merge_image_overlay, merge_video_overlay
-from .parser import parse_html_file
+from .parser import clear_parse_cache, parse_html_file
 from .report import generate_report, save_report, print_report_summary, show_report_popup
 
 
@@ -72,22 +67,34 @@ def download_item(
     stats: dict,
     stats_lock: threading.Lock,
     progress_callback: callable = None,
+    session: requests.Session | None = None,
+    metadata_writer: MetadataWriter | None = None,
 ) -> None:
     if stop_event and stop_event.is_set():
         return
-    memory = memories[idx]
+    if metadata_writer is None:
+        metadata_writer = MetadataWriter(metadata_list, output_path, every=1)
+    date_str = metadata["date"]
     file_num = f"{metadata['number']:02d}"
-    extension = get_file_extension(metadata.get("media_type", "Image"))
 
     def log(msg: str):
-        print(msg)
-        if progress_callback:
-            progress_callback({"type": "log", "message": msg})
+        log_lines([msg])
 
-    log(f"\n# {metadata['number']}")
-    log(f"  Date: {metadata['date']}")
-    log(f"  Type: {metadata['media_type']}")
-    log(f"  Location: {metadata['latitude']}, {metadata['longitude']}")
+    def log_lines(lines: list[str]) -> None:
+        # One write per block so concurrent workers never interleave an item's lines.
+        print("\n".join(lines))
+        if progress_callback:
+            for line in lines:
+                progress_callback({"type": "log", "message": line})
+
+    log_lines(
+        [
+            f"\n# {metadata['number']}",
+            f"  Date: {date_str}",
+            f"  Type: {metadata['media_type']}",
+            f"  Location: {metadata['latitude']}, {metadata['longitude']}",
+        ]
+    )
 
     if metadata.get("status") == "success" and metadata.get("files"):
         log("  Already downloaded, skipping...")
@@ -96,25 +103,24 @@ def download_item(
     if stop_event and stop_event.is_set():
         return
 
-    with metadata_lock:
-        metadata["status"] = "in_progress"
-        save_metadata(metadata_list, output_path)
+    _update_metadata(metadata, metadata_writer, status="in_progress")
 
     try:
         files_saved = download_and_extract(
-            memory["url"],
+            memories[idx]["url"],
             output_path,
             file_num,
-            extension,
+            get_file_extension(metadata.get("media_type", "Image")),
             merge_overlays,
             defer_video_overlays,
-            metadata["date"],
+            date_str,
             metadata["latitude"],
             metadata["longitude"],
             overlays_only,
             use_timestamp_filenames,
             remove_duplicates,
             duplicate_index,
+            session=session,
         )
 
         if stop_event and stop_event.is_set():
@@ -122,50 +128,43 @@ def download_item(
 
         if len(files_saved) == 0:
             log("  Skipped: No overlay detected (overlays-only mode)")
-            with metadata_lock:
-                metadata["status"] = "skipped"
-                metadata["skip_reason"] = "no_overlay"
-                save_metadata(metadata_list, output_path)
+            _update_metadata(metadata, metadata_writer, status="skipped", skip_reason="no_overlay")
             return
 
-        if len(files_saved) > 1:
-            log(f"  ZIP extracted: {len(files_saved)} files")
-            for file_info in files_saved:
-                log(f"    - {file_info['path']} ({file_info['size']:,} bytes)")
-        else:
-            downloaded_file = files_saved[0]
-            log(
-                f"  Downloaded: {downloaded_file['path']} ({downloaded_file['size']:,} bytes)"
-            )
-
-        timestamp = parse_date_to_timestamp(metadata["date"])
+        log_lines(_saved_files_lines(files_saved))
+        timestamp = parse_date_to_timestamp(date_str)
         if timestamp:
-            for file_info in files_saved:
-                file_path = output_path / file_info["path"]
-                set_file_timestamp(file_path, timestamp)
-            log(f"  Timestamp set to: {metadata['date']}")
+            set_file_timestamps(output_path, [f["path"] for f in files_saved], timestamp)
+            log(f"  Timestamp set to: {date_str}")
 
         with metadata_lock:
             metadata["status"] = "success"
             metadata["files"] = files_saved
-
             if any(f.get("deferred") for f in files_saved):
                 with deferred_lock:
                     deferred_overlays.append((file_num, metadata, files_saved))
-
-            # Update total bytes
-            total_bytes = sum(f.get("size", 0) for f in files_saved)
             with stats_lock:
-                stats["total_bytes"] += total_bytes
-
-            save_metadata(metadata_list, output_path)
+                stats["total_bytes"] += sum(f["size"] for f in files_saved if "size" in f)
+            metadata_writer.mark_dirty()
 
     except (OSError, requests.RequestException, zipfile.BadZipFile) as e:
         log(f"  ERROR: {str(e)}")
-        with metadata_lock:
-            metadata["status"] = "failed"
-            metadata["error"] = str(e)
-            save_metadata(metadata_list, output_path)
+        _update_metadata(metadata, metadata_writer, status="failed", error=str(e))
+
+
+def _update_metadata(metadata: dict, metadata_writer: MetadataWriter, **fields) -> None:
+    with metadata_lock:
+        metadata.update(fields)
+        metadata_writer.mark_dirty()
+
+
+def _saved_files_lines(files_saved: list) -> list[str]:
+    if len(files_saved) == 1:
+        saved = files_saved[0]
+        return [f"  Downloaded: {saved['path']} ({saved['size']:,} bytes)"]
+    return [f"  ZIP extracted: {len(files_saved)} files"] + [
+        f"    - {file_info['path']} ({file_info['size']:,} bytes)" for file_info in files_saved
+    ]
 
 
 def download_all_memories(
@@ -190,77 +189,171 @@ def download_all_memories(
     show_report: bool = True,
 ) -> None:
     start_time = time.time()
-    
-    memories = parse_html_file(html_path)
-    if limit is not None and limit >= 0:
-        memories = memories[:limit]
+
+    if limit is not None and limit < 0:
+        limit = None
+    output_path = Path(output_dir)
+    duplicate_index = DuplicateIndex(output_path) if remove_duplicates else None
+    if duplicate_index:
+        # Indexing earlier output is disk-bound and independent of the export,
+        # so it runs while the HTML is parsed; the index's lock makes any
+        # early lookup wait for it.
+        threading.Thread(target=duplicate_index.build, daemon=True).start()
+
+    memories = parse_html_file(html_path, limit=limit)
+    # The run works from its own metadata from here on.
+    clear_parse_cache()
     if not memories:
         print("No memories found in HTML file!")
         return
 
-    output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
-    duplicate_index = DuplicateIndex(output_path) if remove_duplicates else None
-    if duplicate_index:
-        duplicate_index.build()
 
     metadata_list = initialize_metadata(memories, output_path)
+    metadata_writer = MetadataWriter(metadata_list, output_path)
+
+    items_to_download, mode_label, media_label = _select_items(
+        metadata_list, resume, retry_failed, videos_only, pictures_only, overlays_only
+    )
+    if resume or retry_failed:
+        print(f"\n{mode_label} ({media_label}): {len(items_to_download)} items to download")
+    else:
+        print(f"\n{mode_label} ({media_label}) {len(items_to_download)} memories to {output_dir}/")
+
+    if not items_to_download:
+        print("All selected memories already downloaded.")
+        return
+
+    print("=" * 60)
+
+    deferred_overlays: list[tuple[str, dict, list]] = []
+    deferred_lock = threading.Lock()
+    stats = {"total_bytes": 0, "start_time": time.time()}
+    stats_lock = threading.Lock()
 
+    def download(idx: int, metadata: dict, session: requests.Session) -> None:
+        download_item(
+            idx,
+            metadata,
+            memories,
+            output_path,
+            metadata_list,
+            stop_event,
+            merge_overlays,
+            defer_video_overlays,
+            overlays_only,
+            use_timestamp_filenames,
+            remove_duplicates,
+            duplicate_index,
+            deferred_overlays,
+            deferred_lock,
+            stats,
+            stats_lock,
+            progress_callback,
+            session,
+            metadata_writer,
+        )
+
+    print_progress = _progress_printer(len(items_to_download), stats, stats_lock, progress_callback)
+    _download_items(
+        items_to_download, download, print_progress, concurrent, jobs, jobs_supplier, stop_event
+    )
+
+    if stop_event and stop_event.is_set():
+        with metadata_lock:
+            metadata_writer.close()
+        return
+
+    if deferred_overlays:
+        merge_deferred_overlays(
+            deferred_overlays,
+            output_path,
+            use_timestamp_filenames,
+            duplicate_index,
+            metadata_writer,
+            jobs,
+            jobs_supplier,
+            stop_event,
+            progress_callback,
+        )
+
+    with metadata_lock:
+        metadata_writer.close()
+
+    if stop_event and stop_event.is_set():
+        return
+
+    _finish_run(
+        metadata_list,
+        output_path,
+        start_time,
+        join_multi_snaps_enabled,
+        progress_callback,
+        show_report,
+    )
+
+
+def _select_items(
+    metadata_list: list,
+    resume: bool,
+    retry_failed: bool,
+    videos_only: bool,
+    pictures_only: bool,
+    overlays_only: bool,
+) -> tuple[list[tuple[int, dict]], str, str]:
+    """The (index, metadata) pairs this run downloads, plus its mode and media labels."""
     if resume:
-        items_to_download = [
+        items = [
             (i, m)
             for i, m in enumerate(metadata_list)
             if m.get("status") in ["pending", "in_progress", "failed"]
         ]
         mode_label = "Resuming"
     elif retry_failed:
-        items_to_download = [(i, m) for i, m in enumerate(metadata_list) if m.get("status") == "failed"]
+        items = [(i, m) for i, m in enumerate(metadata_list) if m.get("status") == "failed"]
         mode_label = "Retrying failed"
     else:
-        items_to_download = list(enumerate(metadata_list))
+        items = list(enumerate(metadata_list))
         mode_label = "Downloading"
 
     if videos_only:
-        items_to_download = [(i, m) for i, m in items_to_download if m.get("media_type") == "Video"]
+        items = [(i, m) for i, m in items if m.get("media_type") == "Video"]
         media_label = "videos only"
     elif pictures_only:
-        items_to_download = [(i, m) for i, m in items_to_download if m.get("media_type") == "Image"]
+        items = [(i, m) for i, m in items if m.get("media_type") == "Image"]
         media_label = "pictures only"
     else:
         media_label = "all media"
 
-    if resume or retry_failed:
-        print(f"\n{mode_label} ({media_label}): {len(items_to_download)} items to download")
-    else:
-        print(f"\n{mode_label} ({media_label}) {len(items_to_download)} memories to {output_dir}/")
-
-    if not items_to_download:
-        print("All selected memories already downloaded.")
-        return
-
-    print("=" * 60)
-
-    total_items = len(items_to_download)
-    deferred_overlays: list[tuple[str, dict, list]] = []
-    deferred_lock = threading.Lock()
-
-    stats = {"total_bytes": 0, "start_time": time.time()}
-    stats_lock = threading.Lock()
-    completed_counter = {"count": 0}
-    counter_lock = threading.Lock()
-
-    def print_progress(completed: int):
-        elapsed = time.time() - stats["start_time"]
+    if overlays_only:
+        # Memories an earlier overlays-only run found to have no overlay would
+        # only be fetched and discarded again.
+        items = [(i, m) for i, m in items if m.get("skip_reason") != "no_overlay"]
+    return items, mode_label, media_label
+
+
+def _progress_printer(
+    total_items: int, stats: dict, stats_lock: threading.Lock, progress_callback: callable
+) -> Callable[[int], None]:
+    # With many workers finishing items back to back, printing every
+    # completion floods the console (and the GUI's event queue); one line per
+    # interval carries the same information.
+    progress_interval = 0.25
+    last_progress = {"time": 0.0}
+
+    def print_progress(completed: int) -> None:
+        now = time.time()
+        elapsed = now - stats["start_time"]
         with stats_lock:
+            if 0 < completed < total_items and now - last_progress["time"] < progress_interval:
+                return
+            last_progress["time"] = now
             total_b = stats["total_bytes"]
-        speed = total_b / elapsed if elapsed > 0 else 0
-        speed_fmt = format_speed(speed)
+        speed_fmt = format_speed(total_b / elapsed if elapsed > 0 else 0)
         size_fmt = format_size(total_b)
         eta_seconds = None
         if completed > 0:
-            remaining = max(total_items - completed, 0)
-            avg_per_item = elapsed / completed
-            eta_seconds = avg_per_item * remaining
+            eta_seconds = elapsed / completed * max(total_items - completed, 0)
         eta_fmt = format_eta(eta_seconds)
         msg = f"[{completed}/{total_items}] Speed: {speed_fmt} ETA: {eta_fmt} (Total: {size_fmt})"
         print(msg)
@@ -275,355 +368,74 @@ def download_all_memories(
                 "message": msg
             })
 
-    print_progress(0)
-
-    if concurrent and total_items > 1:
-        job_limit_default = max(1, min(int(jobs), 20))
-
-        def read_job_limit() -> int:
-            value = job_limit_default
-            if jobs_supplier:
-                try:
-                    value = int(jobs_supplier())
-                except (TypeError, ValueError):
-                    value = job_limit_default
-            if value < 1:
-                value = 1
-            if value > 20:
-                value = 20
-            return value
-
-        max_workers = 20 if jobs_supplier else job_limit_default
-        allowed_workers = {"value": read_job_limit()}
-        allowed_lock = threading.Lock()
-        allowed_cv = threading.Condition(allowed_lock)
-        monitor_stop = threading.Event()
-
-        def monitor_jobs() -> None:
-            last_value = None
-            while not monitor_stop.is_set():
-                current = read_job_limit()
-                if current != last_value:
-                    with allowed_cv:
-                        allowed_workers["value"] = current
-                        allowed_cv.notify_all()
-                    last_value = current
-                time.sleep(0.3)
-
-        if jobs_supplier:
-            threading.Thread(target=monitor_jobs, daemon=True).start()
+    return print_progress
 
-        print(f"Downloading concurrently using up to {max_workers} workers...")
-        work_queue: queue.Queue[tuple[int, dict] | None] = queue.Queue()
 
-        def worker(worker_id: int) -> None:
-            while True:
+def _download_items(
+    items: list[tuple[int, dict]],
+    download: Callable[[int, dict, requests.Session], None],
+    print_progress: Callable[[int], None],
+    concurrent: bool,
+    jobs: int,
+    jobs_supplier: Callable[[], int] | None,
+    stop_event: threading.Event | None,
+) -> None:
+    print_progress(0)
+    default_jobs = max(1, min(int(jobs), MAX_JOBS))
+    pool_size = MAX_JOBS if jobs_supplier else default_jobs
+    # Closed even if a worker or the sequential loop raises, so the pooled
+    # connections don't linger until garbage collection.
+    with create_download_session(pool_size if concurrent else 1) as session:
+        if not (concurrent and len(items) > 1):
+            for count, (idx, metadata) in enumerate(items, start=1):
                 if stop_event and stop_event.is_set():
-                    pass
-                with allowed_cv:
-                    while worker_id > allowed_workers["value"]:
-                        if stop_event and stop_event.is_set():
-                            break
-                        allowed_cv.wait(timeout=0.5)
-                try:
-                    item = work_queue.get(timeout=0.2)
-                except queue.Empty:
-                    if stop_event and stop_event.is_set():
-                        continue
-                    else:
-                        continue
-                if item is None:
-                    work_queue.task_done()
                     break
-                idx, metadata = item
-                try:
-                    download_item(
-                        idx,
-                        metadata,
-                        memories,
-                        output_path,
-                        metadata_list,
-                        stop_event,
-                        merge_overlays,
-                        defer_video_overlays,
-                        overlays_only,
-                        use_timestamp_filenames,
-                        remove_duplicates,
-                        duplicate_index,
-                        deferred_overlays,
-                        deferred_lock,
-                        stats,
-                        stats_lock,
-                        progress_callback,
-                    )
-                except Exception as e:
-                    print(f"\nERROR: Worker crashed: {e}")
-                finally:
-                    with counter_lock:
-                        completed_counter["count"] += 1
-                        completed = completed_counter["count"]
-                    print_progress(completed)
-                    work_queue.task_done()
-
-        threads = []
-        for worker_id in range(1, max_workers + 1):
-            t = threading.Thread(target=worker, args=(worker_id,), daemon=True)
-            t.start()
-            threads.append(t)
-
-        for item in items_to_download:
-            if stop_event and stop_event.is_set():
-                break
-            work_queue.put(item)
-
-        for _ in threads:
-            work_queue.put(None)
-
-        work_queue.join()
-        monitor_stop.set()
-        with allowed_cv:
-            allowed_cv.notify_all()
-        for t in threads:
-            t.join(timeout=0.5)
-    else:
-        for count, (idx, metadata) in enumerate(items_to_download, start=1):
-            if stop_event and stop_event.is_set():
-                break
-            download_item(
-                idx,
-                metadata,
-                memories,
-                output_path,
-                metadata_list,
-                stop_event,
-                merge_overlays,
-                defer_video_overlays,
-                overlays_only,
-                use_timestamp_filenames,
-                remove_duplicates,
-                duplicate_index,
-                deferred_overlays,
-                deferred_lock,
-                stats,
-                stats_lock,
-                progress_callback,
-            )
-            print_progress(count)
-
-    if stop_event and stop_event.is_set():
-        return
-
-    if deferred_overlays:
-        print("\n" + "=" * 60)
-        print(f"Processing {len(deferred_overlays)} deferred overlay merge(s)...")
-        print("=" * 60)
-        if progress_callback:
-            progress_callback(
-                {
-                    "type": "progress",
-                    "phase": "merge",
-                    "completed": 0,
-                    "total": len(deferred_overlays),
-                    "message": "Merging overlays",
-                }
-            )
+                download(idx, metadata, session)
+                print_progress(count)
+            return
 
-        merge_jobs_default = max(1, min(int(jobs), 20))
-        max_merge_workers = 20 if jobs_supplier else merge_jobs_default
-        allowed_workers = {"value": merge_jobs_default}
-        allowed_lock = threading.Lock()
-        allowed_cv = threading.Condition(allowed_lock)
-        monitor_stop = threading.Event()
-
-        def read_job_limit() -> int:
-            value = merge_jobs_default
-            if jobs_supplier:
-                try:
-                    value = int(jobs_supplier())
-                except (TypeError, ValueError):
-                    value = merge_jobs_default
-            if value < 1:
-                value = 1
-            if value > 20:
-                value = 20
-            return value
-
-        def monitor_jobs() -> None:
-            last_value = None
-            while not monitor_stop.is_set():
-                current = read_job_limit()
-                if current != last_value:
-                    with allowed_cv:
-                        allowed_workers["value"] = current
-                        allowed_cv.notify_all()
-                    last_value = current
-                monitor_stop.wait(0.3)
-
-        if jobs_supplier:
-            threading.Thread(target=monitor_jobs, daemon=True).start()
-
-        merge_queue: queue.Queue[tuple[int, tuple[str, dict, list]] | None] = queue.Queue()
-        merge_counter = {"count": 0}
-        merge_counter_lock = threading.Lock()
-        dup_lock = threading.Lock()
-
-        def merge_one(item: tuple[str, dict, list]) -> None:
-            file_num, metadata, files_saved = item
-            main_file = None
-            overlay_file = None
-            for file_info in files_saved:
-                file_path = output_path / file_info["path"]
-                if file_info["type"] == "main":
-                    main_file = file_path
-                elif file_info["type"] == "overlay":
-                    overlay_file = file_path
-
-            if not (main_file and overlay_file):
-                return
+        # Small batches (test mode) never need more workers than items.
+        max_workers = min(pool_size, len(items))
+        print(f"Downloading concurrently using up to {max_workers} workers...")
+        completed_counter = {"count": 0}
+        counter_lock = threading.Lock()
 
+        def handle(item: tuple[int, dict]) -> None:
             try:
-                extension = main_file.suffix
-                output_filename = generate_filename(
-                    metadata["date"], extension, use_timestamp_filenames, file_num
-                )
-                merged_file = output_path / output_filename
-
-                is_video = extension.lower() in [".mp4", ".mov", ".avi"]
-                if is_video:
-                    print("  Merging video overlay (this may take a while)...")
-                    success = merge_video_overlay(main_file, overlay_file, merged_file)
-                else:
-                    print("  Merging image overlay...")
-                    with open(main_file, "rb") as f:
-                        main_data = f.read()
-                    with open(overlay_file, "rb") as f:
-                        overlay_data = f.read()
-                    merged_data = merge_image_overlay(main_data, overlay_data)
-                    merged_data = add_exif_metadata(
-                        merged_data,
-                        metadata["date"],
-                        metadata["latitude"],
-                        metadata["longitude"],
-                    )
-                    with open(merged_file, "wb") as f:
-                        f.write(merged_data)
-                    success = merged_file.exists() and merged_file.stat().st_size > 0
-
-                if success:
-                    with metadata_lock:
-                        metadata["files"] = [
-                            {"path": output_filename, "size": merged_file.stat().st_size, "type": "merged"}
-                        ]
-
-                    timestamp = parse_date_to_timestamp(metadata["date"])
-                    if timestamp:
-                        set_file_timestamp(merged_file, timestamp)
-
-                    if main_file.exists():
-                        if duplicate_index:
-                            with dup_lock:
-                                duplicate_index.unregister_file(main_file)
-                        main_file.unlink()
-                        print(f"  Deleted: {main_file.name}")
-                    if overlay_file.exists():
-                        if duplicate_index:
-                            with dup_lock:
-                                duplicate_index.unregister_file(overlay_file)
-                        overlay_file.unlink()
-                        print(f"  Deleted: {overlay_file.name}")
-
-                    print(f"  Success: {output_filename} ({merged_file.stat().st_size:,} bytes)")
-                else:
-                    print("  ERROR: Overlay merge failed, keeping separate files")
-
+                download(*item, session)
             except Exception as e:
-                print(f"  ERROR: {str(e)}")
-                print("  Keeping separate -main/-overlay files")
+                print(f"\nERROR: Worker crashed: {e}")
+            finally:
+                with counter_lock:
+                    completed_counter["count"] += 1
+                    completed = completed_counter["count"]
+                print_progress(completed)
 
-        def worker(worker_id: int) -> None:
-            while True:
-                if stop_event and stop_event.is_set():
-                    pass
-                with allowed_cv:
-                    while worker_id > allowed_workers["value"]:
-                        if stop_event and stop_event.is_set():
-                            break
-                        allowed_cv.wait(timeout=0.5)
-                try:
-                    item = merge_queue.get(timeout=0.2)
-                except queue.Empty:
-                    if stop_event and stop_event.is_set():
-                        continue
-                    else:
-                        continue
-                if item is None:
-                    merge_queue.task_done()
-                    break
-                idx, payload = item
-                print(f"\n({idx}/{len(deferred_overlays)}) Processing deferred merge #{payload[1]['number']}")
-                merge_one(payload)
-                with merge_counter_lock:
-                    merge_counter["count"] += 1
-                    completed = merge_counter["count"]
-                if progress_callback:
-                    progress_callback(
-                        {
-                            "type": "progress",
-                            "phase": "merge",
-                            "completed": completed,
-                            "total": len(deferred_overlays),
-                            "message": f"Merging overlays ({completed}/{len(deferred_overlays)})",
-                        }
-                    )
-                merge_queue.task_done()
-
-        threads = []
-        for worker_id in range(1, max_merge_workers + 1):
-            t = threading.Thread(target=worker, args=(worker_id,), daemon=True)
-            t.start()
-            threads.append(t)
-
-        for idx, item in enumerate(deferred_overlays, start=1):
-            if stop_event and stop_event.is_set():
-                break
-            merge_queue.put((idx, item))
-
-        for _ in threads:
-            merge_queue.put(None)
-
-        merge_queue.join()
-        monitor_stop.set()
-        with allowed_cv:
-            allowed_cv.notify_all()
-        for t in threads:
-            t.join(timeout=0.5)
-
-        with metadata_lock:
-            save_metadata(metadata_list, output_path)
-        print("\n" + "=" * 60)
-        print("Deferred overlay processing complete!")
+        run_job_pool(items, handle, max_workers, default_jobs, jobs_supplier, stop_event)
 
-    metadata_file = output_path / "metadata.json"
-    with metadata_lock:
-        save_metadata(metadata_list, output_path)
-
-    if stop_event and stop_event.is_set():
-        return
 
+def _finish_run(
+    metadata_list: list,
+    output_path: Path,
+    start_time: float,
+    join_multi_snaps_enabled: bool,
+    progress_callback: callable,
+    show_report: bool,
+) -> None:
     print("\n" + "=" * 60)
     print("Download complete!")
     print(f"Files saved to: {output_path.absolute()}")
-    print(f"Metadata saved to: {metadata_file.absolute()}")
+    print(f"Metadata saved to: {(output_path / 'metadata.json').absolute()}")
 
     if join_multi_snaps_enabled:
         join_multi_snaps(output_path)
 
     end_time = time.time()
-    
+
     # Generate comprehensive report
     report = generate_report(metadata_list, output_path, start_time, end_time)
     report_file = save_report(report, output_path)
-    
+
     # Show report summary in console
     print_report_summary(report)
 
@@ -639,11 +451,11 @@ def download_all_memories(
             )
         except Exception:
             pass
-    
-    # Show GUI popup if requested and not stopped
-    if show_report and progress_callback is None and not (stop_event and stop_event.is_set()):
+
+    # Show GUI popup if requested (stopped runs return before this)
+    if show_report and progress_callback is None:
         show_report_popup(report, report_file)
-    
+
     # Legacy command suggestions
     if report["totals"]["failed"] > 0:
         print("\nTo retry failed downloads, run:")
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import io
+import os
 import subprocess
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 from . import deps
 from .subprocess_utils import run_capture
@@ -10,16 +14,45 @@ from .subprocess_utils import run_capture
 
 _IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
 
-
-def merge_image_overlay(main_data: bytes, overlay_data: bytes) -> bytes:
+# Overlay merges run on the download/merge workers, whose count is tuned for
+# network throughput. Each ffmpeg encode is itself multi-threaded, so cap how
+# many run at once to avoid oversubscribing the CPU (or the GPU's session limit).
+MAX_CONCURRENT_ENCODES = max(1, (os.cpu_count() or 2) // 2)
+_encode_slots = threading.BoundedSemaphore(MAX_CONCURRENT_ENCODES)
+# Encodes currently holding a slot. When several overlap, each gets its share
+# of cores for both the slice-threaded overlay filter and libx264 (which
+# otherwise starts a thread per core in every process); a lone encode keeps
+# ffmpeg's own defaults and the whole machine.
+_active_encodes = 0
+_active_encodes_lock = threading.Lock()
+
+# A GPU encoder can be listed by `ffmpeg -encoders` yet unusable (no device,
+# driver or session limit). Once it has failed on clips the CPU encoder then
+# handled, stop trying it first; each failed attempt is a wasted ffmpeg run.
+_GPU_FAILURE_LIMIT = 2
+_gpu_failures: dict[str, int] = {}
+_gpu_failures_lock = threading.Lock()
+
+
+def merge_image_overlay(
+    main_data: bytes | Path, overlay_data: bytes | Path, exif_bytes: bytes | None = None
+) -> bytes:
+    """
+    Composite the overlay onto the main image; `exif_bytes` is embedded in the
+    same encode. Either input may be a path, which Pillow decodes from the
+    file directly instead of from a copy held in memory.
+    """
     if deps.Image is None:
         raise ImportError("Pillow is required for overlay merging")
 
-    main_img = deps.Image.open(io.BytesIO(main_data))
-    overlay_img = deps.Image.open(io.BytesIO(overlay_data))
+    main_img = _open_image(main_data)
+    overlay_img = _open_image(overlay_data)
 
     original_format = main_img.format or "JPEG"
+    return _encode_image(_composite(main_img, overlay_img), original_format, exif_bytes)
+
 
+def _composite(main_img, overlay_img):
     if overlay_img.mode != "RGBA":
         overlay_img = overlay_img.convert("RGBA")
 
@@ -27,20 +60,43 @@ def merge_image_overlay(main_data: bytes, overlay_data: bytes) -> bytes:
         main_img = main_img.convert("RGB")
 
     if overlay_img.size != main_img.size:
-        overlay_img = overlay_img.resize(main_img.size, deps.Image.Resampling.LANCZOS)
-
-    main_img.paste(overlay_img, (0, 0), overlay_img)
-
+        # Overlays are text/stickers that are usually near full size, where
+        # bilinear is indistinguishable and far cheaper; keep Lanczos for big
+        # upscales.
+        if max(main_img.size) > 4 * max(overlay_img.size):
+            resample = deps.Image.Resampling.LANCZOS
+        else:
+            resample = deps.Image.Resampling.BILINEAR
+        overlay_img = overlay_img.resize(main_img.size, resample)
+
+    # Overlays are mostly fully transparent around their text/stickers; blend
+    # only the region that has any coverage (nothing at all if it's blank).
+    bbox = overlay_img.getchannel("A").getbbox()
+    if bbox is not None:
+        visible = overlay_img.crop(bbox) if bbox != (0, 0, *overlay_img.size) else overlay_img
+        main_img.paste(visible, bbox[:2], visible)
+    return main_img
+
+
+def _encode_image(main_img, original_format: str, exif_bytes: bytes | None) -> bytes:
     output = io.BytesIO()
+    exif_kwargs = {"exif": exif_bytes} if exif_bytes else {}
+    # Pin the fast baseline encoder; the optimize/progressive passes cost far
+    # more than they save at quality 95.
+    jpeg_kwargs = {"quality": 95, "optimize": False, "progressive": False}
 
     if original_format in ["JPEG", "JPG"]:
         if main_img.mode == "RGBA":
             main_img = main_img.convert("RGB")
-        main_img.save(output, format="JPEG", quality=95)
+        main_img.save(output, format="JPEG", **jpeg_kwargs, **exif_kwargs)
     elif original_format == "PNG":
-        main_img.save(output, format="PNG")
+        try:
+            main_img.save(output, format="PNG", **exif_kwargs)
+        except Exception:
+            output = io.BytesIO()
+            main_img.save(output, format="PNG")
     elif original_format == "WEBP":
-        main_img.save(output, format="WEBP", quality=95)
+        main_img.save(output, format="WEBP", quality=95, **exif_kwargs)
     elif original_format in ["GIF", "BMP", "TIFF"]:
         if main_img.mode == "RGBA":
             main_img = main_img.convert("RGB")
@@ -48,43 +104,40 @@ def merge_image_overlay(main_data: bytes, overlay_data: bytes) -> bytes:
     else:
         if main_img.mode == "RGBA":
             main_img = main_img.convert("RGB")
-        main_img.save(output, format="JPEG", quality=95)
+        main_img.save(output, format="JPEG", **jpeg_kwargs, **exif_kwargs)
 
     return output.getvalue()
 
 
+def _open_image(source: bytes | Path):
+    if isinstance(source, Path):
+        return deps.Image.open(source)
+    return deps.Image.open(io.BytesIO(source))
+
+
 def build_ffmpeg_overlay_command(
-    main_path: Path,
+    main_path: Path | None,
     overlay_path: Path,
     output_path: Path,
     *,
     copy_audio: bool,
     encoder: str | None = None,
     use_hwaccel: bool = False,
+    threads: int | None = None,
 ) -> list[str]:
-    overlay_is_image = overlay_path.suffix.lower() in _IMAGE_EXTS
+    """
+    Build the overlay command; a `main_path` of None reads the main video from
+    stdin. `threads` caps the filter and libx264 threads; None leaves ffmpeg's defaults.
+    """
     selected_encoder = encoder or deps.get_best_h264_encoder()
-    hwaccel_args = deps.get_hwaccel_args(selected_encoder) if use_hwaccel else []
-
-    cmd = [deps.ffmpeg_path or "ffmpeg", "-hide_banner", "-nostdin"]
-    if hwaccel_args:
-        cmd += hwaccel_args
-    cmd += ["-y", "-i", str(main_path)]
-    if overlay_is_image:
-        cmd += ["-loop", "1", "-i", str(overlay_path)]
-    else:
-        cmd += ["-i", str(overlay_path)]
-
-    filter_complex = (
-        "[0:v]setsar=1[base];"
-        "[1:v]setsar=1[ovr];"
-        "[ovr][base]scale2ref[ovr_s][base_s];"
-        "[base_s][ovr_s]overlay=eof_action=pass:format=auto[outv]"
-    )
+    is_vaapi = selected_encoder == "h264_vaapi"
 
+    cmd = _input_args(main_path, overlay_path, selected_encoder, use_hwaccel)
+    if threads is not None:
+        cmd += ["-filter_complex_threads", str(threads)]
     cmd += [
         "-filter_complex",
-        filter_complex,
+        _overlay_filter(is_vaapi),
         "-map",
         "[outv]",
         "-map",
@@ -94,29 +147,80 @@ def build_ffmpeg_overlay_command(
     ]
 
     # Encoder specific settings
-    cmd += _encoder_settings(selected_encoder)
+    cmd += _encoder_settings(selected_encoder, threads)
 
-    cmd += [
-        "-pix_fmt",
-        "yuv420p",
-        "-movflags",
-        "+faststart",
-    ]
+    if not is_vaapi:
+        cmd += ["-pix_fmt", "yuv420p"]
+    cmd += ["-movflags", "+faststart"]
 
     cmd += _audio_settings(copy_audio)
     cmd += [str(output_path)]
     return cmd
 
 
-def _encoder_settings(encoder: str) -> list[str]:
+def _input_args(
+    main_path: Path | None, overlay_path: Path, encoder: str, use_hwaccel: bool
+) -> list[str]:
+    cmd = [deps.ffmpeg_path or "ffmpeg", "-hide_banner", "-nostdin"]
+    if use_hwaccel:
+        cmd += deps.get_hwaccel_args(encoder)
+    if encoder == "h264_vaapi":
+        cmd += ["-vaapi_device", deps.VAAPI_DEVICE]
+    cmd += ["-y", "-i", "pipe:0" if main_path is None else str(main_path)]
+    if overlay_path.suffix.lower() in _IMAGE_EXTS:
+        cmd += ["-loop", "1", "-i", str(overlay_path)]
+    else:
+        cmd += ["-i", str(overlay_path)]
+    return cmd
+
+
+def _overlay_filter(is_vaapi: bool) -> str:
+    filter_complex = (
+        "[0:v]setsar=1[base];"
+        "[1:v]setsar=1[ovr];"
+        "[ovr][base]scale2ref[ovr_s][base_s];"
+        "[base_s][ovr_s]overlay=eof_action=pass:format=auto[outv]"
+    )
+    if is_vaapi:
+        # Composite in software, then upload the frames for the VAAPI encoder.
+        filter_complex = (
+            filter_complex.replace("[outv]", "[comp]")
+            + ";[comp]format=nv12,hwupload[outv]"
+        )
+    return filter_complex
+
+
+def _encoder_settings(encoder: str, threads: int | None = None) -> list[str]:
     if "nvenc" in encoder:
         return ["-rc", "vbr", "-cq", "23", "-preset", "p3"]
     if "amf" in encoder:
         return ["-rc", "vbaq", "-quality", "balanced"]
     if "qsv" in encoder:
         return ["-global_quality", "23", "-preset", "balanced"]
+    if "videotoolbox" in encoder:
+        return ["-b:v", "5M", "-allow_sw", "1"]
+    if "vaapi" in encoder:
+        return ["-qp", "23"]
     # Default libx264 settings
-    return ["-preset", "veryfast", "-crf", "23"]
+    settings = ["-preset", "veryfast", "-crf", "23"]
+    if threads is not None:
+        settings += ["-threads", str(threads)]
+    return settings
+
+
+@contextmanager
+def _encode_slot() -> Iterator[int | None]:
+    """Hold an encode slot; yields the thread cap for this encode, None if it runs alone."""
+    global _active_encodes
+    with _encode_slots:
+        with _active_encodes_lock:
+            _active_encodes += 1
+            active = _active_encodes
+        try:
+            yield None if active == 1 else max(1, (os.cpu_count() or 1) // active)
+        finally:
+            with _active_encodes_lock:
+                _active_encodes -= 1
 
 
 def _audio_settings(copy_audio: bool) -> list[str]:
@@ -148,7 +252,17 @@ def _summarize_ffmpeg_stderr(stderr_text: str) -> str:
     return text[-8000:]
 
 
-def merge_video_overlay(main_path: Path, overlay_path: Path, output_path: Path) -> bool:
+def merge_video_overlay(
+    main_path: Path | None,
+    overlay_path: Path,
+    output_path: Path,
+    *,
+    main_data: bytes | BinaryIO | None = None,
+) -> bool:
+    """
+    Burn `overlay_path` onto the main video, read from `main_path` or piped
+    from `main_data`. A stream must be seekable; it is rewound for each retry.
+    """
     if not deps.ffmpeg_available:
         raise RuntimeError("FFmpeg is not available")
 
@@ -159,38 +273,15 @@ def merge_video_overlay(main_path: Path, overlay_path: Path, output_path: Path)
                 print("    FFmpeg: GPU encoder failed, retrying with CPU...")
 
             for copy_audio in (True, False):
-                cmd = build_ffmpeg_overlay_command(
-                    main_path,
-                    overlay_path,
-                    output_path,
-                    copy_audio=copy_audio,
-                    encoder=encoder,
-                    use_hwaccel=False,
-                )
-                result = run_capture(cmd, timeout=600)
-
-                if (
-                    result.returncode == 0
-                    and output_path.exists()
-                    and output_path.stat().st_size > 1000
+                if main_path is None and hasattr(main_data, "seek"):
+                    main_data.seek(0)
+                if _encode_overlay(
+                    main_path, overlay_path, output_path, main_data, encoder, copy_audio
                 ):
+                    if enc_idx > 0:
+                        _record_gpu_failure(encoder_candidates[0])
                     return True
 
-                if output_path.exists():
-                    try:
-                        output_path.unlink()
-                    except Exception:
-                        pass
-
-                stderr_text = result.stderr.decode("utf-8", errors="ignore")
-                audio_mode = "copy" if copy_audio else "aac"
-                print(
-                    f"    FFmpeg failed (exit {result.returncode}, encoder={encoder}, audio={audio_mode})"
-                )
-                summary = _summarize_ffmpeg_stderr(stderr_text)
-                if summary:
-                    print(summary)
-
         return False
 
     except subprocess.TimeoutExpired:
@@ -201,8 +292,61 @@ def merge_video_overlay(main_path: Path, overlay_path: Path, output_path: Path)
         return False
 
 
+def _encode_overlay(
+    main_path: Path | None,
+    overlay_path: Path,
+    output_path: Path,
+    main_data: bytes | BinaryIO | None,
+    encoder: str,
+    copy_audio: bool,
+) -> bool:
+    """One ffmpeg attempt; a failed attempt's partial output is removed and its error logged."""
+    with _encode_slot() as threads:
+        cmd = build_ffmpeg_overlay_command(
+            main_path,
+            overlay_path,
+            output_path,
+            copy_audio=copy_audio,
+            encoder=encoder,
+            use_hwaccel=False,
+            threads=threads,
+        )
+        result = run_capture(
+            cmd,
+            timeout=600,
+            input=main_data if main_path is None else None,
+        )
+
+    if result.returncode == 0 and output_path.exists() and output_path.stat().st_size > 1000:
+        return True
+
+    try:
+        output_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+    stderr_text = result.stderr.decode("utf-8", errors="ignore")
+    audio_mode = "copy" if copy_audio else "aac"
+    print(f"    FFmpeg failed (exit {result.returncode}, encoder={encoder}, audio={audio_mode})")
+    summary = _summarize_ffmpeg_stderr(stderr_text)
+    if summary:
+        print(summary)
+    return False
+
+
 def _encoder_fallbacks() -> list[str]:
     encoder = deps.get_best_h264_encoder()
     if deps.is_gpu_encoder(encoder):
+        with _gpu_failures_lock:
+            if _gpu_failures.get(encoder, 0) >= _GPU_FAILURE_LIMIT:
+                return ["libx264"]
         return [encoder, "libx264"]
     return [encoder]
+
+
+def _record_gpu_failure(encoder: str) -> None:
+    with _gpu_failures_lock:
+        count = _gpu_failures.get(encoder, 0) + 1
+        _gpu_failures[encoder] = count
+    if count == _GPU_FAILURE_LIMIT:
+        print(f"    FFmpeg: {encoder} keeps failing, using the CPU encoder from now on")
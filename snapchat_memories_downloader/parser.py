@@ -1,15 +1,58 @@
 from __future__ import annotations
 
+import os
 import re
+import threading
 from html.parser import HTMLParser
-from typing import Callable
+from itertools import islice
+from typing import Callable, Iterator
 
+try:
+    from lxml import etree as _etree
+except ImportError:  # pragma: no cover - lxml is optional
+    _etree = None
 
 DOWNLOAD_URL_RE = re.compile(
     r"""downloadMemories\(\s*(['"])([^'"]+)\1""",
     re.IGNORECASE,
 )
 DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} UTC")
+_MEDIA_TYPES = frozenset({"Image", "Video"})
+_LATLON_PREFIX = "Latitude, Longitude:"
+
+# The GUI parses the selected file to count memories, then Start parses it
+# again; keep the most recent result keyed by path, size and mtime until a
+# run takes it (see clear_parse_cache).
+_last_parse: tuple[tuple[str, int, int], tuple[dict, ...]] | None = None
+_last_parse_lock = threading.Lock()
+
+
+def _extract_download_url(onclick: str) -> str | None:
+    # Anchor the precompiled pattern at the call instead of scanning for it.
+    pos = onclick.find("downloadMemories")
+    if pos < 0:
+        return None
+    match = DOWNLOAD_URL_RE.match(onclick, pos)
+    return match.group(2) if match else None
+
+
+def _apply_cell_text(row: dict, data: str) -> None:
+    if not data or data.isspace():
+        return
+    data = data.strip()
+
+    # Each kind of cell has a cheap tell, so a text node costs one suffix,
+    # set or prefix check rather than a scan per kind.
+    if data.endswith(" UTC"):
+        if DATE_RE.fullmatch(data):
+            row["date"] = data
+    elif data in _MEDIA_TYPES:
+        row["media_type"] = data
+    elif data.startswith(_LATLON_PREFIX):
+        lat, sep, lon = data[len(_LATLON_PREFIX) :].partition(",")
+        if sep and "," not in lon:
+            row["latitude"] = lat.strip()
+            row["longitude"] = lon.strip()
 
 
 class MemoriesParser(HTMLParser):
@@ -40,55 +83,148 @@ class MemoriesParser(HTMLParser):
             self.cell_index += 1
         elif tag == "a" and self.in_table_row:
             for attr_name, attr_value in attrs:
-                if (
-                    attr_name == "onclick"
-                    and attr_value
-                    and "downloadMemories" in attr_value
-                ):
-                    match = DOWNLOAD_URL_RE.search(attr_value)
-                    if match:
-                        self.current_row["url"] = match.group(2)
+                if attr_name == "onclick" and attr_value:
+                    url = _extract_download_url(attr_value)
+                    if url:
+                        self.current_row["url"] = url
 
     def handle_data(self, data):
         if self.current_tag != "td" or not self.in_table_row:
             return
 
-        data = data.strip()
-        if not data:
-            return
-
-        if DATE_RE.fullmatch(data):
-                self.current_row["date"] = data
-        elif data in ["Image", "Video"]:
-            self.current_row["media_type"] = data
-        elif "Latitude, Longitude:" in data:
-            coords = data.replace("Latitude, Longitude:", "").strip()
-            lat_lon = coords.split(",")
-            if len(lat_lon) == 2:
-                self.current_row["latitude"] = lat_lon[0].strip()
-                self.current_row["longitude"] = lat_lon[1].strip()
+        _apply_cell_text(self.current_row, data)
 
     def handle_endtag(self, tag):
         if tag == "td":
             self.current_tag = None
         elif tag == "tr" and self.in_table_row:
             if "url" in self.current_row and "date" in self.current_row:
-                self.memories.append(self.current_row.copy())
+                self.memories.append(self.current_row)
             self.in_table_row = False
             self.current_row = {}
 
 
-def parse_html_file(html_path: str, log: Callable[[str], None] | None = print) -> list:
+def parse_html_file(
+    html_path: str,
+    log: Callable[[str], None] | None = print,
+    limit: int | None = None,
+) -> list:
+    """Parse memories from `html_path`; with `limit`, stop once that many are found."""
+    global _last_parse
+
     if log:
         log(f"Parsing {html_path}...")
-    parser = MemoriesParser()
-    with open(html_path, "r", encoding="utf-8", errors="replace") as f:
+    st = os.stat(html_path)
+    key = (os.path.abspath(html_path), st.st_size, st.st_mtime_ns)
+    with _last_parse_lock:
+        cached = _last_parse
+    if cached is not None and cached[0] == key:
+        # An earlier caller may have filled its rows in; hand out copies.
+        memories = [dict(m) for m in cached[1][:limit]]
+    elif limit is not None:
+        # Partial results must not populate the cache.
+        memories = _parse_memories(html_path, limit)
+    else:
+        memories = _parse_memories(html_path)
+        with _last_parse_lock:
+            _last_parse = (key, tuple(memories))
+
+    if log:
+        log(f"Found {len(memories)} memories")
+    return memories
+
+
+def clear_parse_cache() -> None:
+    """Forget the cached parse, so a long-lived GUI process doesn't keep the export in memory."""
+    global _last_parse
+
+    with _last_parse_lock:
+        _last_parse = None
+
+
+def _parse_memories(html_path: str, limit: int | None = None) -> list[dict]:
+    return list(islice(iter_memories(html_path), limit))
+
+
+def iter_memories(html_path: str) -> Iterator[dict]:
+    """Yield each memory row as soon as its `</tr>` is parsed, without caching."""
+    if _etree is not None:
+        target = _MemoriesTarget()
+        parser = _etree.HTMLParser(target=target, encoding="utf-8", huge_tree=True)
+        f = open(html_path, "rb")
+    else:
+        target = parser = MemoriesParser()
+        f = open(html_path, "r", encoding="utf-8", errors="replace")
+    with f:
+        # The export is read once, front to back; let the kernel read ahead
+        # aggressively.
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
         while True:
             chunk = f.read(1024 * 1024)
             if not chunk:
                 break
             parser.feed(chunk)
+            if target.memories:
+                yield from target.memories
+                target.memories.clear()
+    parser.close()
+    yield from target.memories
 
-    if log:
-        log(f"Found {len(parser.memories)} memories")
-    return parser.memories
+
+class _MemoriesTarget:
+    """
+    lxml parser target mirroring MemoriesParser.
+
+    Callbacks arrive straight from libxml2's SAX events, so no element tree
+    is built. Text is buffered until the next tag because a text node can be
+    delivered in several pieces.
+    """
+
+    def __init__(self) -> None:
+        self.memories: list[dict] = []
+        self._row: dict | None = None
+        self._in_td = False
+        self._text: list[str] = []
+
+    def _flush_text(self) -> None:
+        if self._text:
+            _apply_cell_text(self._row, "".join(self._text))
+            self._text.clear()
+
+    def start(self, tag, attrib) -> None:
+        self._flush_text()
+        if tag == "tr":
+            self._row = {}
+            self._in_td = False
+        elif self._row is None:
+            return
+        elif tag == "td":
+            self._in_td = True
+        elif tag == "a":
+            onclick = attrib.get("onclick")
+            if onclick:
+                url = _extract_download_url(onclick)
+                if url:
+                    self._row["url"] = url
+
+    def data(self, data) -> None:
+        # Text outside a memory's cells (headers, scripts, inter-tag
+        # whitespace) is never looked at; don't buffer it.
+        if self._in_td and self._row is not None:
+            self._text.append(data)
+
+    def end(self, tag) -> None:
+        self._flush_text()
+        if tag == "td":
+            self._in_td = False
+        elif tag == "tr" and self._row is not None:
+            if "url" in self._row and "date" in self._row:
+                self.memories.append(self._row)
+            self._row = None
+
+    def close(self) -> None:
+        self._flush_text()
@@ -9,24 +9,26 @@ from typing import Dict, List
 def generate_report(metadata_list: List[Dict], output_path: Path, start_time: float, end_time: float) -> Dict:
     """Generate comprehensive download report."""
     
-    # Count statuses
-    successful = sum(1 for m in metadata_list if m.get("status") == "success")
-    failed = sum(1 for m in metadata_list if m.get("status") == "failed")
-    pending = sum(1 for m in metadata_list if m.get("status") == "pending")
-    skipped = sum(1 for m in metadata_list if m.get("status") == "skipped")
-    
-    # Count file types and merges
+    # Tally everything in a single pass over the metadata
+    status_counts = {"success": 0, "failed": 0, "pending": 0, "skipped": 0}
     merged_files = 0
     main_overlay_pairs = 0
     single_files = 0
     total_files = 0
+    total_size = 0
+    errors = []
     
-    for m in metadata_list:
-        if m.get("status") == "success":
+    for i, m in enumerate(metadata_list):
+        status = m.get("status")
+        if status in status_counts:
+            status_counts[status] += 1
+        
+        if status == "success":
             files = m.get("files", [])
             total_files += len(files)
             
             for file_info in files:
+                total_size += file_info.get("size", 0)
                 file_type = file_info.get("type", "single")
                 if file_type == "merged":
                     merged_files += 1
@@ -35,18 +37,7 @@ def generate_report(metadata_list: List[Dict], output_path: Path, start_time: fl
                         main_overlay_pairs += 1
                 else:
                     single_files += 1
-    
-    # Calculate sizes
-    total_size = 0
-    for m in metadata_list:
-        if m.get("status") == "success":
-            for file_info in m.get("files", []):
-                total_size += file_info.get("size", 0)
-    
-    # Collect errors
-    errors = []
-    for i, m in enumerate(metadata_list):
-        if m.get("status") == "failed":
+        elif status == "failed":
             error_msg = m.get("error", "Unknown error")
             errors.append(f"#{m.get('number', i+1)}: {error_msg}")
     
@@ -58,10 +49,10 @@ def generate_report(metadata_list: List[Dict], output_path: Path, start_time: fl
         "output_directory": str(output_path.absolute()),
         "totals": {
             "memories_processed": len(metadata_list),
-            "successful": successful,
-            "failed": failed,
-            "pending": pending,
-            "skipped": skipped,
+            "successful": status_counts["success"],
+            "failed": status_counts["failed"],
+            "pending": status_counts["pending"],
+            "skipped": status_counts["skipped"],
             "total_files": total_files,
             "total_size_bytes": total_size
         },
@@ -9,12 +9,15 @@ them via creation flags/startup info.
 from __future__ import annotations
 
 import os
+import shutil
 import signal
 import subprocess
 import threading
 import time
 from collections.abc import Sequence
-from typing import Any
+from typing import Any, BinaryIO
+
+from .files import COPY_BUFFER_SIZE
 
 
 _tracked_pids: set[int] = set()
@@ -123,12 +126,18 @@ def _no_window_kwargs(*, extra_creationflags: int = 0) -> dict[str, Any]:
     return kwargs
 
 
-def run_capture(cmd: Sequence[str], *, timeout: int) -> subprocess.CompletedProcess[bytes]:
+def run_capture(
+    cmd: Sequence[str], *, timeout: int, input: bytes | BinaryIO | None = None
+) -> subprocess.CompletedProcess[bytes]:
+    """
+    Run `cmd` and capture its output. `input` may be bytes or a readable
+    stream, which is copied to the child's stdin from a helper thread.
+    """
     job_handle, extra_creationflags = _prepare_windows_job()
 
     proc = subprocess.Popen(
         list(cmd),
-        stdin=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL if input is None else subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         **_no_window_kwargs(extra_creationflags=extra_creationflags),
@@ -136,9 +145,17 @@ def run_capture(cmd: Sequence[str], *, timeout: int) -> subprocess.CompletedProc
     )
     track_pid(proc.pid)
     _attach_process_to_job(proc, job_handle)
+    feeder = stdin_pipe = None
+    if input is not None and not isinstance(input, (bytes, bytearray, memoryview)):
+        # communicate() only accepts bytes; detach stdin so it leaves the pipe
+        # to the feeder instead of closing it.
+        stdin_pipe, proc.stdin = proc.stdin, None
+        feeder = threading.Thread(target=_feed_stdin, args=(input, stdin_pipe), daemon=True)
+        feeder.start()
+        input = None
     try:
         try:
-            stdout, stderr = proc.communicate(timeout=timeout)
+            stdout, stderr = proc.communicate(input=input, timeout=timeout)
             return subprocess.CompletedProcess(list(cmd), proc.returncode, stdout, stderr)
         except subprocess.TimeoutExpired as exc:
             _terminate_pid_tree(proc.pid)
@@ -148,9 +165,34 @@ def run_capture(cmd: Sequence[str], *, timeout: int) -> subprocess.CompletedProc
                 pass
             raise exc
     finally:
+        if feeder is not None:
+            # The feeder reads the caller's stream; it must be done before we
+            # return. Writes fail once the child is gone or the pipe is closed.
+            if proc.poll() is None:
+                _terminate_pid_tree(proc.pid)
+            _close_quietly(stdin_pipe)
+            feeder.join()
         untrack_pid(proc.pid)
 
 
+def _feed_stdin(stream: BinaryIO, pipe: BinaryIO) -> None:
+    try:
+        shutil.copyfileobj(stream, pipe, COPY_BUFFER_SIZE)
+    except (OSError, ValueError):
+        # The child exited without reading everything (or run_capture closed
+        # the pipe after it); its exit status says why.
+        pass
+    finally:
+        _close_quietly(pipe)
+
+
+def _close_quietly(pipe: BinaryIO) -> None:
+    try:
+        pipe.close()
+    except (OSError, ValueError):
+        pass
+
+
 def _prepare_windows_job() -> tuple[int | None, int]:
     if os.name != "nt":
         return None, 0
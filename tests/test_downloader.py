@@ -0,0 +1,178 @@
+import io
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from snapchat_memories_downloader.downloader import download_and_extract
+
+
+class _FakeResponse:
+    def __init__(self, content: bytes, first_chunk: int | None = None) -> None:
+        self._content = content
+        self._pos = 0
+        self._first_chunk = first_chunk
+        self.chunks_read = 0
+        self.bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def iter_content(self, chunk_size: int):
+        # Like a real streamed body, a new iterator continues where the last stopped.
+        while self._pos < len(self._content):
+            # Servers may deliver a short first chunk regardless of chunk_size.
+            size, self._first_chunk = self._first_chunk or chunk_size, None
+            chunk = self._content[self._pos : self._pos + size]
+            self._pos += len(chunk)
+            self.chunks_read += 1
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+class _FakeSession:
+    def __init__(self, content: bytes, first_chunk: int | None = None) -> None:
+        self._content = content
+        self._first_chunk = first_chunk
+        self.responses: list[_FakeResponse] = []
+
+    def get(self, *args, **kwargs):
+        response = _FakeResponse(self._content, self._first_chunk)
+        self.responses.append(response)
+        return response
+
+
+MP4 = b"\x00\x00\x00\x18ftypisom" + b"m" * 5000
+
+
+class TestDownloader(unittest.TestCase):
+    def test_plain_video_is_streamed_to_final_name(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            files = download_and_extract(
+                "https://example.com/v", out, "1", ".bin", session=_FakeSession(MP4)
+            )
+            names = sorted(p.name for p in out.iterdir())
+            data = (out / "1.mp4").read_bytes()
+
+        self.assertEqual(files, [{"path": "1.mp4", "size": len(MP4), "type": "single"}])
+        self.assertEqual(names, ["1.mp4"])
+        self.assertEqual(data, MP4)
+
+    def test_streamed_duplicate_video_is_discarded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            for num in ("1", "2"):
+                files = download_and_extract(
+                    "https://example.com/v",
+                    out,
+                    num,
+                    ".bin",
+                    check_duplicates=True,
+                    session=_FakeSession(MP4),
+                )
+            names = sorted(p.name for p in out.iterdir())
+
+        self.assertEqual(files[0]["type"], "duplicate")
+        self.assertEqual(files[0]["duplicate_of"], "1.mp4")
+        self.assertEqual(names, ["1.mp4"])
+
+    def test_duplicate_check_sees_files_changed_between_calls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            kwargs = {"check_duplicates": True, "session": _FakeSession(MP4)}
+            download_and_extract("https://example.com/v", out, "1", ".bin", **kwargs)
+            (out / "1.mp4").write_bytes(b"x" * len(MP4))
+            files = download_and_extract("https://example.com/v", out, "2", ".bin", **kwargs)
+
+        self.assertEqual(files[0]["type"], "single")
+
+    def test_overlays_only_abandons_non_zip_after_first_chunk(self):
+        session = _FakeSession(MP4 + b"m" * (3 << 20))
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            files = download_and_extract(
+                "https://example.com/v", out, "1", ".mp4", overlays_only=True, session=session
+            )
+            names = list(out.iterdir())
+
+        self.assertEqual(files, [])
+        self.assertEqual(names, [])
+        self.assertEqual(session.responses[0].chunks_read, 1)
+        self.assertEqual(session.responses[0].bytes_read, 4)
+
+    def test_overlays_only_keeps_whole_zip_after_peek(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("abc-main.mp4", MP4)
+            zf.writestr("abc-overlay.png", b"\x89PNG\r\n\x1a\n" + b"p" * 200)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            files = download_and_extract(
+                "https://example.com/z",
+                out,
+                "1",
+                ".mp4",
+                overlays_only=True,
+                session=_FakeSession(buf.getvalue()),
+            )
+            main = (out / "1-main.mp4").read_bytes()
+
+        self.assertEqual([f["type"] for f in files], ["main", "overlay"])
+        self.assertEqual(main, MP4)
+
+    def test_overlays_only_peek_survives_short_first_chunk(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("abc-main.mp4", MP4)
+            zf.writestr("abc-overlay.png", b"\x89PNG\r\n\x1a\n" + b"p" * 200)
+        with tempfile.TemporaryDirectory() as tmp:
+            files = download_and_extract(
+                "https://example.com/z",
+                Path(tmp),
+                "1",
+                ".mp4",
+                overlays_only=True,
+                session=_FakeSession(buf.getvalue(), first_chunk=2),
+            )
+
+        self.assertEqual([f["type"] for f in files], ["main", "overlay"])
+
+    def test_zip_download_is_spooled_and_cleaned_up(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("abc-main.mp4", MP4)
+            zf.writestr("abc-overlay.png", b"\x89PNG\r\n\x1a\n" + b"p" * 200)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            files = download_and_extract(
+                "https://example.com/z", out, "1", ".mp4", session=_FakeSession(buf.getvalue())
+            )
+            names = sorted(p.name for p in out.iterdir())
+
+        self.assertEqual([f["type"] for f in files], ["main", "overlay"])
+        self.assertEqual(names, ["1-main.mp4", "1-overlay.png"])
+
+    def test_short_first_chunk_is_still_classified(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("abc-main.mp4", MP4)
+            zf.writestr("abc-overlay.png", b"\x89PNG\r\n\x1a\n" + b"p" * 200)
+        for content, expected in ((buf.getvalue(), ["main", "overlay"]), (MP4, ["single"])):
+            with self.subTest(expected=expected), tempfile.TemporaryDirectory() as tmp:
+                session = _FakeSession(content, first_chunk=2)
+                files = download_and_extract(
+                    "https://example.com/z", Path(tmp), "1", ".mp4", session=session
+                )
+
+                self.assertEqual([f["type"] for f in files], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from snapchat_memories_downloader.duplicates import (
+    DuplicateIndex,
+    detect_and_remove_duplicates,
+    is_duplicate_file,
+)
+from snapchat_memories_downloader.hashing import (
+    HASH_CACHE_NAME,
+    QUICK_HASH_WINDOW,
+    compute_data_hash,
+    stored_hash,
+)
+
+
+class TestDuplicates(unittest.TestCase):
+    def test_index_finds_existing_file_with_precomputed_hash(self):
+        data = b"same bytes" * 50
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "existing.jpg").write_bytes(data)
+            index = DuplicateIndex(out)
+
+            is_dup, name, data_hash = index.check_data(data, compute_data_hash(data))
+
+        self.assertTrue(is_dup)
+        self.assertEqual(name, "existing.jpg")
+        self.assertEqual(data_hash, compute_data_hash(data))
+
+    def test_index_skips_hashing_when_no_file_has_the_same_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "existing.jpg").write_bytes(b"x" * 10)
+            index = DuplicateIndex(out)
+
+            self.assertEqual(index.check_data(b"y" * 11), (False, None, None))
+
+    def test_index_rejects_same_size_file_by_quick_hash(self):
+        size = 4 * QUICK_HASH_WINDOW
+        existing = b"a" * size
+        new = b"b" + b"a" * (size - 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "existing.mp4").write_bytes(existing)
+            index = DuplicateIndex(out)
+
+            self.assertEqual(index.check_data(new), (False, None, None))
+            is_dup, name, _ = index.check_data(existing)
+
+        self.assertTrue(is_dup)
+        self.assertEqual(name, "existing.mp4")
+
+    def test_index_checks_zip_member_without_reading_it_unless_sizes_match(self):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("a-main.mp4", b"video" * 20)
+            zf.writestr("a-overlay.mp4", b"other" * 21)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "existing.mp4").write_bytes(b"video" * 20)
+            index = DuplicateIndex(out)
+
+            with zipfile.ZipFile(buf) as zf:
+                reads = []
+                original_read = zf.read
+                zf.read = lambda info: reads.append(info.filename) or original_read(info)
+
+                miss = index.check_zip_member(zf, zf.getinfo("a-overlay.mp4"))
+                hit = index.check_zip_member(zf, zf.getinfo("a-main.mp4"))
+
+        self.assertEqual(miss, (False, None, None))
+        self.assertEqual(hit[:2], (True, "existing.mp4"))
+        self.assertEqual(reads, ["a-main.mp4"])
+
+    def test_is_duplicate_file_scans_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "a.jpg").write_bytes(b"one")
+            (out / "b.jpg").write_bytes(b"two")
+            (out / "sub").mkdir()
+
+            self.assertEqual(is_duplicate_file(b"two", out, True), (True, "b.jpg"))
+            self.assertEqual(is_duplicate_file(b"six", out, True), (False, None))
+
+    def test_detect_and_remove_duplicates_keeps_one_copy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            # Identical content saved at different times is still a duplicate.
+            for offset, name in enumerate(("a.jpg", "b.jpg")):
+                (out / name).write_bytes(b"same")
+                os.utime(out / name, (1_700_000_000 + offset, 1_700_000_000 + offset))
+            (out / "c.jpg").write_bytes(b"diff")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = detect_and_remove_duplicates(out)
+            remaining = sorted(p.name for p in out.iterdir() if p.name != HASH_CACHE_NAME)
+
+        self.assertEqual(result["files_deleted"], 1)
+        self.assertEqual(result["space_saved"], 4)
+        self.assertEqual(len(remaining), 2)
+        self.assertIn("c.jpg", remaining)
+
+    def test_detect_uses_recorded_hashes_but_verifies_before_deleting(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "a.jpg").write_bytes(b"aaaa")
+            (out / "b.jpg").write_bytes(b"bbbb")
+            (out / "c.jpg").write_bytes(b"cccc")
+            # c.jpg's recorded hash is stale and claims it matches a.jpg.
+            files = [
+                {"path": "a.jpg", "size": 4, "hash": stored_hash(compute_data_hash(b"aaaa"))},
+                {"path": "b.jpg", "size": 4, "hash": stored_hash(compute_data_hash(b"bbbb"))},
+                {"path": "c.jpg", "size": 4, "hash": stored_hash(compute_data_hash(b"aaaa"))},
+            ]
+            (out / "metadata.json").write_text(json.dumps([{"files": files}]), encoding="utf-8")
+
+            with mock.patch(
+                "snapchat_memories_downloader.duplicates.compute_file_hash",
+                side_effect=lambda path: compute_data_hash(path.read_bytes()),
+            ) as hash_file, contextlib.redirect_stdout(io.StringIO()):
+                result = detect_and_remove_duplicates(out)
+            hashed = sorted(call.args[0].name for call in hash_file.call_args_list)
+            remaining = sorted(p.name for p in out.iterdir() if p.name != HASH_CACHE_NAME)
+
+        self.assertEqual(result["files_deleted"], 0)
+        self.assertEqual(hashed, ["a.jpg", "c.jpg"])
+        self.assertEqual(remaining, ["a.jpg", "b.jpg", "c.jpg", "metadata.json"])
+
+    def test_detect_skips_full_hash_when_samples_differ(self):
+        size = 4 * QUICK_HASH_WINDOW
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "a.mp4").write_bytes(b"a" * size)
+            (out / "b.mp4").write_bytes(b"b" * size)
+            (out / "c.mp4").write_bytes(b"a" * size)
+
+            with mock.patch(
+                "snapchat_memories_downloader.duplicates.compute_file_hash",
+                side_effect=lambda path: compute_data_hash(path.read_bytes()),
+            ) as hash_file, contextlib.redirect_stdout(io.StringIO()):
+                result = detect_and_remove_duplicates(out)
+            hashed = sorted(call.args[0].name for call in hash_file.call_args_list)
+
+        self.assertEqual(result["files_deleted"], 1)
+        self.assertEqual(hashed, ["a.mp4", "c.mp4"])
+
+    def test_detect_reuses_hash_cache_from_previous_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            (out / "a.jpg").write_bytes(b"aaaa")
+            (out / "b.jpg").write_bytes(b"bbbb")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                detect_and_remove_duplicates(out)
+            self.assertTrue((out / HASH_CACHE_NAME).exists())
+
+            (out / "b.jpg").write_bytes(b"cccc")
+            os.utime(out / "b.jpg", ns=(1, 1))
+            with mock.patch(
+                "snapchat_memories_downloader.duplicates.compute_file_hash",
+                side_effect=lambda path: compute_data_hash(path.read_bytes()),
+            ) as hash_file, contextlib.redirect_stdout(io.StringIO()):
+                result = detect_and_remove_duplicates(out)
+            hashed = [call.args[0].name for call in hash_file.call_args_list]
+
+        self.assertEqual(result["files_deleted"], 0)
+        self.assertEqual(hashed, ["b.jpg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+import piexif
+
+from snapchat_memories_downloader.exif_utils import (
+    add_exif_metadata,
+    build_exif_bytes,
+    decimal_to_dms,
+)
+from snapchat_memories_downloader.overlay import merge_image_overlay
+
+
+def _encode(img, fmt):
+    out = io.BytesIO()
+    img.save(out, format=fmt)
+    return out.getvalue()
+
+
+class TestExifUtils(unittest.TestCase):
+    def test_add_exif_metadata_writes_date_and_gps(self):
+        data = _encode(Image.new("RGB", (8, 8), "red"), "JPEG")
+        tagged = add_exif_metadata(data, "2024-01-02 03:04:05 UTC", "12.5", "-45.25")
+
+        exif = piexif.load(tagged)
+        self.assertEqual(exif["Exif"][piexif.ExifIFD.DateTimeOriginal], b"2024:01:02 03:04:05")
+        self.assertEqual(exif["GPS"][piexif.GPSIFD.GPSLatitudeRef], b"N")
+        self.assertEqual(exif["GPS"][piexif.GPSIFD.GPSLongitudeRef], b"W")
+
+    def test_decimal_to_dms(self):
+        self.assertEqual(decimal_to_dms(12.5), ((12, 1), (30, 1), (0, 100)))
+        self.assertEqual(decimal_to_dms(-157.04), ((157, 1), (2, 1), (2400, 100)))
+
+    def test_jpeg_exif_is_spliced_without_reencoding(self):
+        data = _encode(Image.new("RGB", (8, 8), "red"), "JPEG")
+        tagged = add_exif_metadata(data, "2024-01-02 03:04:05 UTC", "Unknown", "Unknown")
+
+        # The entropy-coded scan (from SOS on) is untouched.
+        self.assertTrue(tagged.endswith(data[data.index(b"\xff\xda") :]))
+        self.assertIn(piexif.ExifIFD.DateTimeOriginal, piexif.load(tagged)["Exif"])
+
+    def test_png_and_webp_exif_is_spliced_without_reencoding(self):
+        img = Image.new("RGB", (9, 7), "red")
+        for fmt in ("PNG", "WEBP"):
+            with self.subTest(fmt=fmt):
+                data = _encode(img, fmt)
+                tagged = add_exif_metadata(data, "2024-01-02 03:04:05 UTC", "12.5", "-45.25")
+                retagged = add_exif_metadata(tagged, "2025-01-02 03:04:05 UTC", "Unknown", "Unknown")
+
+                with Image.open(io.BytesIO(tagged)) as out, Image.open(io.BytesIO(data)) as src:
+                    self.assertEqual(out.tobytes(), src.tobytes())
+                    self.assertEqual(out.getexif()[306], "2024:01:02 03:04:05")
+                with Image.open(io.BytesIO(retagged)) as out:
+                    self.assertEqual(out.getexif()[306], "2025:01:02 03:04:05")
+                self.assertEqual(retagged.count(b"2024:01:02"), 0)
+
+    def test_formats_without_exif_support_are_returned_untouched(self):
+        data = _encode(Image.new("RGB", (8, 8), "red"), "GIF")
+        self.assertIs(add_exif_metadata(data, "2024-01-02 03:04:05 UTC", "1", "2"), data)
+
+    def test_corrupt_webp_header_is_returned_untouched(self):
+        # VP8 frame header declaring a 0x0 canvas.
+        frame = b"\x00\x00\x00\x9d\x01\x2a\x00\x00\x00\x00"
+        data = b"RIFF" + (len(frame) + 12).to_bytes(4, "little") + b"WEBP"
+        data += b"VP8 " + len(frame).to_bytes(4, "little") + frame
+        self.assertEqual(add_exif_metadata(data, "2024-01-02 03:04:05 UTC", "1", "2"), data)
+
+    def test_merge_embeds_exif_in_single_encode(self):
+        main = _encode(Image.new("RGB", (8, 8), "red"), "JPEG")
+        overlay = _encode(Image.new("RGBA", (4, 4), (0, 0, 255, 128)), "PNG")
+        exif_bytes = build_exif_bytes("2024-01-02 03:04:05 UTC", "Unknown", "Unknown")
+
+        merged = merge_image_overlay(main, overlay, exif_bytes)
+
+        exif = piexif.load(merged)
+        self.assertEqual(exif["0th"][piexif.ImageIFD.DateTime], b"2024:01:02 03:04:05")
+        self.assertEqual(Image.open(io.BytesIO(merged)).size, (8, 8))
+
+    def test_merge_blends_only_visible_overlay_region(self):
+        main_img = Image.new("RGB", (16, 16), "red")
+        overlay_img = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
+        overlay_img.paste((0, 0, 255, 128), (4, 6, 9, 12))
+        expected = main_img.copy()
+        expected.paste(overlay_img, (0, 0), overlay_img)
+
+        merged = merge_image_overlay(_encode(main_img, "PNG"), _encode(overlay_img, "PNG"))
+        blank = merge_image_overlay(
+            _encode(main_img, "PNG"), _encode(Image.new("RGBA", (16, 16)), "PNG")
+        )
+
+        self.assertEqual(Image.open(io.BytesIO(merged)).tobytes(), expected.tobytes())
+        self.assertEqual(Image.open(io.BytesIO(blank)).tobytes(), main_img.tobytes())
+
+    def test_merge_accepts_paths(self):
+        main = _encode(Image.new("RGB", (8, 8), "red"), "JPEG")
+        overlay = _encode(Image.new("RGBA", (8, 8), (0, 0, 255, 128)), "PNG")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            main_path = Path(tmp) / "1-main.jpg"
+            overlay_path = Path(tmp) / "1-overlay.png"
+            main_path.write_bytes(main)
+            overlay_path.write_bytes(overlay)
+
+            self.assertEqual(
+                merge_image_overlay(main_path, overlay_path), merge_image_overlay(main, overlay)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
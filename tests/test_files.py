@@ -1,6 +1,16 @@
+import os
+import tempfile
 import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
 
-from snapchat_memories_downloader.files import generate_filename
+from snapchat_memories_downloader.files import (
+    generate_filename,
+    parse_date_to_timestamp,
+    set_file_timestamps,
+    write_file_atomic,
+)
 
 
 class TestFiles(unittest.TestCase):
@@ -19,6 +29,35 @@ class TestFiles(unittest.TestCase):
         filename = generate_filename("not a date", ".jpg", use_timestamp=True, fallback_num="01")
         self.assertEqual(filename, "01.jpg")
 
+    def test_parse_date_matches_strptime(self):
+        for date_str in ("2024-01-02 03:04:05 UTC", "2023-12-31 23:59:59"):
+            expected = datetime.strptime(date_str.replace(" UTC", ""), "%Y-%m-%d %H:%M:%S")
+            self.assertEqual(parse_date_to_timestamp(date_str), expected.timestamp())
+        self.assertIsNone(parse_date_to_timestamp("2024-13-02 03:04:05 UTC"))
+        self.assertIsNone(parse_date_to_timestamp("not a date"))
+
+    def test_set_file_timestamps_updates_every_file(self):
+        timestamp = parse_date_to_timestamp("2024-01-02 03:04:05 UTC")
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            for name in ("01-main.jpg", "01-overlay.png"):
+                (out / name).write_bytes(b"x")
+            set_file_timestamps(out, ["01-main.jpg", "01-overlay.png"], timestamp)
+            for name in ("01-main.jpg", "01-overlay.png"):
+                self.assertEqual(os.stat(out / name).st_mtime, timestamp)
+
+    def test_write_file_atomic_can_keep_cached_pages(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch(
+            "snapchat_memories_downloader.files.drop_cached_pages"
+        ) as drop:
+            path = Path(tmp) / "a.bin"
+            write_file_atomic(path, b"kept", drop_cache=False)
+            self.assertEqual(drop.call_count, 0)
+            write_file_atomic(path, b"dropped")
+            self.assertEqual(drop.call_count, 1)
+            self.assertEqual(path.read_bytes(), b"dropped")
+            self.assertEqual(os.listdir(tmp), ["a.bin"])
+
 
 if __name__ == "__main__":
     unittest.main()
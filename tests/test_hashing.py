@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from snapchat_memories_downloader.hashing import (
+    compute_data_hash,
+    compute_file_hash,
+    load_hash_cache,
+    new_data_hasher,
+    save_hash_cache,
+)
+
+
+class TestHashing(unittest.TestCase):
+    def test_incremental_hash_matches_data_hash(self):
+        data = b"abc" * 100000
+        hasher = new_data_hasher()
+        for i in range(0, len(data), 4096):
+            hasher.update(data[i : i + 4096])
+        self.assertEqual(hasher.hexdigest(), compute_data_hash(data))
+
+    def test_file_hash_matches_data_hash(self):
+        data = b"xyz" * 100000
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "a.bin"
+            path.write_bytes(data)
+            self.assertEqual(compute_file_hash(path), compute_data_hash(data))
+
+    def test_hash_cache_round_trips(self):
+        files = {"a.jpg": [4, 123, "abcd"]}
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp)
+            self.assertEqual(load_hash_cache(folder), {})
+            save_hash_cache(folder, files)
+            self.assertEqual(load_hash_cache(folder), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
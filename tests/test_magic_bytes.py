@@ -1,11 +1,17 @@
 import unittest
 
-from snapchat_memories_downloader.magic_bytes import detect_file_kind, extension_for_kind
+from snapchat_memories_downloader.magic_bytes import (
+    detect_file_kind,
+    extension_for_kind,
+    has_mp4_signature,
+    mp4_moov_before_mdat,
+)
 
 
 class TestMagicBytes(unittest.TestCase):
     def test_detect_zip(self):
         self.assertEqual(detect_file_kind(b"PK\x03\x04rest"), "zip")
+        self.assertEqual(detect_file_kind(b"PK\x05\x06rest"), "unknown")
 
     def test_detect_jpeg(self):
         self.assertEqual(detect_file_kind(b"\xff\xd8\xff\xe0rest"), "jpeg")
@@ -21,10 +27,21 @@ class TestMagicBytes(unittest.TestCase):
         data = b"\x00\x00\x00\x18ftypisom\x00\x00\x00\x00"
         self.assertEqual(detect_file_kind(data), "mp4")
 
+    def test_mp4_signature(self):
+        self.assertTrue(has_mp4_signature(b"\x00\x00\x00\x08wide"))
+        self.assertFalse(has_mp4_signature(b"<!DOCTYPE html>"))
+
     def test_extension_mapping(self):
         self.assertEqual(extension_for_kind("jpeg", ".bin"), ".jpg")
         self.assertEqual(extension_for_kind("unknown", ".bin"), ".bin")
 
+    def test_moov_before_mdat(self):
+        ftyp = b"\x00\x00\x00\x10ftypisom\x00\x00\x00\x00"
+        moov = b"\x00\x00\x00\x08moov"
+        mdat = b"\x00\x00\x00\x0cmdat\x00\x00\x00\x00"
+        self.assertTrue(mp4_moov_before_mdat(ftyp + moov + mdat))
+        self.assertFalse(mp4_moov_before_mdat(ftyp + mdat + moov))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,37 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from PIL import Image
+
+from snapchat_memories_downloader.merge_existing import merge_existing_files
+
+
+def _encode(img, fmt):
+    out = io.BytesIO()
+    img.save(out, format=fmt)
+    return out.getvalue()
+
+
+class TestMergeExisting(unittest.TestCase):
+    def test_merges_pairs_and_skips_unmatched_mains(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp)
+            for n in range(4):
+                (folder / f"{n}-main.jpg").write_bytes(_encode(Image.new("RGB", (8, 8), "red"), "JPEG"))
+                if n % 2 == 0:
+                    overlay = Image.new("RGBA", (8, 8), (0, 0, 255, 128))
+                    (folder / f"{n}-overlay.png").write_bytes(_encode(overlay, "PNG"))
+
+            with redirect_stdout(io.StringIO()):
+                result = merge_existing_files(tmp, jobs=2)
+            merged = sorted(p.name for p in folder.iterdir() if "-" not in p.name)
+
+        self.assertEqual(result, {"merged": 2, "skipped": 2, "errors": 0})
+        self.assertEqual(merged, ["0.jpg", "2.jpg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
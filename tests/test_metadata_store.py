@@ -3,7 +3,12 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from snapchat_memories_downloader.metadata_store import initialize_metadata
+from snapchat_memories_downloader.metadata_store import (
+    MetadataWriter,
+    initialize_metadata,
+    metadata_lock,
+    save_metadata,
+)
 
 
 class TestMetadataStore(unittest.TestCase):
@@ -71,6 +76,69 @@ class TestMetadataStore(unittest.TestCase):
             rebuilt = json.loads((out / "metadata.json").read_text(encoding="utf-8"))
             self.assertEqual(len(rebuilt), 1)
 
+    def test_save_metadata_keeps_unicode_and_indent(self):
+        metadata = [{"number": 1, "date": "2024-01-01 00:00:00 UTC", "error": "caf\u00e9", "files": []}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            save_metadata(metadata, out)
+            text = (out / "metadata.json").read_text(encoding="utf-8")
+            self.assertEqual(json.loads(text), metadata)
+            self.assertEqual(text, json.dumps(metadata, indent=2, ensure_ascii=False))
+
+    def test_metadata_writer_batches_saves(self):
+        metadata = [{"number": 1, "status": "pending", "files": []}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            writer = MetadataWriter(metadata, out, every=2, interval=3600)
+            metadata[0]["status"] = "in_progress"
+            writer.mark_dirty()
+            self.assertFalse((out / "metadata.json").exists())
+
+            metadata[0]["status"] = "success"
+            writer.mark_dirty()
+            saved = json.loads((out / "metadata.json").read_text(encoding="utf-8"))
+            self.assertEqual(saved[0]["status"], "success")
+
+            metadata[0]["status"] = "failed"
+            writer.mark_dirty()
+            writer.flush()
+            saved = json.loads((out / "metadata.json").read_text(encoding="utf-8"))
+            self.assertEqual(saved[0]["status"], "failed")
+
+    def test_metadata_writer_timer_saves_idle_changes(self):
+        metadata = [{"number": 1, "status": "pending", "files": []}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            writer = MetadataWriter(metadata, out, every=100, interval=0.05)
+            with metadata_lock:
+                metadata[0]["status"] = "success"
+                writer.mark_dirty()
+            timer = writer._timer
+            timer.join(timeout=5)
+
+            saved = json.loads((out / "metadata.json").read_text(encoding="utf-8"))
+            self.assertEqual(saved[0]["status"], "success")
+
+    def test_writer_close_writes_and_cancels_timer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            metadata = [{"number": 1, "status": "pending"}]
+            writer = MetadataWriter(metadata, out, every=10, interval=60.0)
+            with metadata_lock:
+                metadata[0]["status"] = "success"
+                writer.mark_dirty()
+                self.assertIsNotNone(writer._timer)
+                self.assertTrue(writer._exit_hook)
+                writer.close()
+            self.assertIsNone(writer._timer)
+            self.assertFalse(writer._exit_hook)
+            on_disk = json.loads((out / "metadata.json").read_text(encoding="utf-8"))
+
+        self.assertEqual(on_disk[0]["status"], "success")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from pathlib import Path
+
+from snapchat_memories_downloader.multisnap import _group_by_time_gaps
+
+
+class TestMultiSnap(unittest.TestCase):
+    def test_group_by_time_gaps_splits_on_large_gaps(self):
+        mtimes = [0, 5, 9, 30, 100, 108, 200]
+        videos = [{"path": Path(f"{i}.mp4"), "mtime": t} for i, t in enumerate(mtimes)]
+
+        groups = _group_by_time_gaps(videos, 10)
+
+        self.assertEqual(
+            [[v["mtime"] for v in group] for group in groups],
+            [[0, 5, 9], [100, 108]],
+        )
+
+    def test_group_by_time_gaps_without_groups(self):
+        videos = [{"path": Path("a.mp4"), "mtime": 0}, {"path": Path("b.mp4"), "mtime": 60}]
+        self.assertEqual(_group_by_time_gaps(videos, 10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
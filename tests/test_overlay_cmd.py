@@ -1,6 +1,10 @@
+import os
+import threading
 import unittest
 from pathlib import Path
+from unittest import mock
 
+from snapchat_memories_downloader import overlay
 from snapchat_memories_downloader.overlay import build_ffmpeg_overlay_command
 
 
@@ -28,6 +32,66 @@ class TestOverlayCommand(unittest.TestCase):
         self.assertNotIn("-loop 1", cmd_str)
         self.assertIn("-i overlay.mp4", cmd_str)
 
+    def test_missing_main_path_reads_from_stdin(self):
+        cmd = build_ffmpeg_overlay_command(
+            None,
+            Path("overlay.png"),
+            Path("out.mp4"),
+            copy_audio=True,
+        )
+        self.assertIn("-y -i pipe:0 -loop 1 -i overlay.png", " ".join(cmd))
+
+    def test_vaapi_encoder_uploads_frames(self):
+        cmd = build_ffmpeg_overlay_command(
+            Path("main.mp4"),
+            Path("overlay.png"),
+            Path("out.mp4"),
+            copy_audio=True,
+            encoder="h264_vaapi",
+        )
+        cmd_str = " ".join(cmd)
+        self.assertIn("-vaapi_device", cmd)
+        self.assertIn("[comp]format=nv12,hwupload[outv]", cmd_str)
+        self.assertNotIn("yuv420p", cmd)
+
+    def test_libx264_thread_count_is_capped(self):
+        cmd = build_ffmpeg_overlay_command(
+            Path("main.mp4"),
+            Path("overlay.png"),
+            Path("out.mp4"),
+            copy_audio=True,
+            encoder="libx264",
+            threads=3,
+        )
+        self.assertEqual(cmd[cmd.index("-threads") + 1], "3")
+        self.assertEqual(cmd[cmd.index("-filter_complex_threads") + 1], "3")
+        self.assertLess(cmd.index("-c:v"), cmd.index("-threads"))
+
+    def test_lone_encode_keeps_ffmpeg_thread_defaults(self):
+        with mock.patch.object(overlay, "_encode_slots", threading.BoundedSemaphore(2)):
+            with overlay._encode_slot() as threads:
+                self.assertIsNone(threads)
+                with overlay._encode_slot() as overlapping:
+                    self.assertEqual(overlapping, max(1, (os.cpu_count() or 1) // 2))
+        cmd = build_ffmpeg_overlay_command(
+            Path("main.mp4"),
+            Path("overlay.png"),
+            Path("out.mp4"),
+            copy_audio=True,
+            encoder="libx264",
+        )
+        self.assertNotIn("-threads", cmd)
+        self.assertNotIn("-filter_complex_threads", cmd)
+
+    def test_gpu_encoder_is_skipped_after_repeated_failures(self):
+        with mock.patch.object(
+            overlay.deps, "get_best_h264_encoder", return_value="h264_nvenc"
+        ), mock.patch.dict(overlay._gpu_failures, clear=True):
+            self.assertEqual(overlay._encoder_fallbacks(), ["h264_nvenc", "libx264"])
+            for _ in range(overlay._GPU_FAILURE_LIMIT):
+                overlay._record_gpu_failure("h264_nvenc")
+            self.assertEqual(overlay._encoder_fallbacks(), ["libx264"])
+
 
 if __name__ == "__main__":
     unittest.main()
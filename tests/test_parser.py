@@ -1,8 +1,10 @@
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from snapchat_memories_downloader.parser import parse_html_file
+from snapchat_memories_downloader import parser
+from snapchat_memories_downloader.parser import iter_memories, parse_html_file
 
 
 class TestParser(unittest.TestCase):
@@ -47,6 +49,72 @@ class TestParser(unittest.TestCase):
         self.assertEqual(memories[0]["url"], "https://example.com/b")
         self.assertEqual(memories[0]["media_type"], "Video")
 
+    def test_reparses_when_file_changes(self):
+        row = """
+          <tr>
+            <td>2024-01-02 03:04:05 UTC</td>
+            <td>Image</td>
+            <td><a onclick="downloadMemories('https://example.com/{n}', 'x')">Download</a></td>
+          </tr>
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = Path(tmp) / "memories_history.html"
+            html_path.write_text(f"<table>{row.format(n=1)}</table>", encoding="utf-8")
+            first = parse_html_file(str(html_path), log=None)
+            html_path.write_text(f"<table>{row.format(n=1)}{row.format(n=2)}</table>", encoding="utf-8")
+            second = parse_html_file(str(html_path), log=None)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual([m["url"] for m in second], ["https://example.com/1", "https://example.com/2"])
+
+    def test_limit_returns_first_memories_only(self):
+        rows = "".join(
+            f"""<tr><td>2024-01-02 03:04:05 UTC</td><td>Image</td>
+            <td><a onclick="downloadMemories('https://example.com/{n}', 'x')">Download</a></td></tr>"""
+            for n in range(5)
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = Path(tmp) / "memories_history.html"
+            html_path.write_text(f"<table>{rows}</table>", encoding="utf-8")
+            memories = parse_html_file(str(html_path), log=None, limit=3)
+
+        self.assertEqual([m["url"] for m in memories], [f"https://example.com/{n}" for n in range(3)])
+
+    def test_cached_rows_are_not_shared_with_callers(self):
+        html = """<table><tr><td>2024-01-02 03:04:05 UTC</td><td>Image</td>
+        <td><a onclick="downloadMemories('https://example.com/a', 'x')">Download</a></td></tr></table>"""
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = Path(tmp) / "memories_history.html"
+            html_path.write_text(html, encoding="utf-8")
+            parse_html_file(str(html_path), log=None)
+            with mock.patch.object(parser, "_parse_memories") as reparse:
+                hit = parse_html_file(str(html_path), log=None)
+                hit[0]["status"] = "success"
+                again = parse_html_file(str(html_path), log=None)
+                parser.clear_parse_cache()
+                parse_html_file(str(html_path), log=None)
+
+        self.assertNotIn("status", again[0])
+        self.assertEqual(reparse.call_count, 1)
+
+    def test_lxml_and_fallback_parsers_agree(self):
+        rows = "".join(
+            f"""<tr><td>2024-01-02 03:04:{n:02d} UTC</td><td>{"Video" if n % 2 else "Image"}</td>
+            <td>Latitude, Longitude: 1.5, -2.{n}</td>
+            <td><a onclick="downloadMemories('https://example.com/{n}?a=1&amp;b=2', this)">Download</a></td></tr>"""
+            for n in range(4)
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = Path(tmp) / "memories_history.html"
+            html_path.write_text(f"<table><tr><th>Date</th></tr>{rows}</table>", encoding="utf-8")
+            default = list(iter_memories(str(html_path)))
+            with mock.patch.object(parser, "_etree", None):
+                fallback = list(iter_memories(str(html_path)))
+
+        self.assertEqual(len(default), 4)
+        self.assertEqual(default, fallback)
+        self.assertEqual(default[1]["url"], "https://example.com/1?a=1&b=2")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+import io
+import sys
+import unittest
+
+from snapchat_memories_downloader.subprocess_utils import run_capture
+
+_ECHO = [sys.executable, "-c", "import sys; sys.stdout.buffer.write(sys.stdin.buffer.read())"]
+
+
+class TestRunCapture(unittest.TestCase):
+    def test_stream_input_is_copied_to_stdin(self):
+        data = b"frame" * (1 << 18)
+        result = run_capture(_ECHO, timeout=30, input=io.BytesIO(data))
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, data)
+
+    def test_child_exiting_early_does_not_raise(self):
+        cmd = [sys.executable, "-c", "import sys; sys.stdin.buffer.read(1); sys.exit(3)"]
+        result = run_capture(cmd, timeout=30, input=io.BytesIO(b"x" * (4 << 20)))
+
+        self.assertEqual(result.returncode, 3)
+
+    def test_feeder_is_done_with_stream_on_return(self):
+        class _Stream(io.BytesIO):
+            reads_after_return = 0
+            returned = False
+
+            def read(self, *args):
+                if self.returned:
+                    _Stream.reads_after_return += 1
+                return super().read(*args)
+
+        stream = _Stream(b"x" * (8 << 20))
+        cmd = [sys.executable, "-c", "import sys; sys.exit(0)"]
+        run_capture(cmd, timeout=30, input=stream)
+        stream.returned = True
+        stream.close()
+
+        self.assertEqual(_Stream.reads_after_return, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()